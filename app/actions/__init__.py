@@ -1 +1,8 @@
-from ._cars import ActionsCarsError, check_car, send_for_repair, send_to_parking
+from ._cars import (
+    ActionsCarsError,
+    check_car,
+    run_bulk_action,
+    run_job,
+    send_for_repair,
+    send_to_parking,
+)
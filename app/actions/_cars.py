@@ -1,15 +1,17 @@
 import logging
-from functools import partial
 
-from fastapi import BackgroundTasks
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app import models
-from app.garage import GarageClient
-from app.repo import create_task
+from app import models, schemas
+from app.admission import AdmissionControl
+from app.garage import GarageClient, MemoGarageClient
+from app.idempotency import IdempotencyKeys
+from app.journal import MessageJournal
+from app.repo import enqueue_task, enqueue_tasks
 
 from ._garage import _add_problem, _check, _fix_problems, _get_problems, _update_status
-from ._runner import _run_steps
+from ._retry import DEFAULT_RETRY_POLICY
+from ._runner import Step, Workflow, _run_steps
 
 
 class ActionsCarsError(Exception):
@@ -19,53 +21,227 @@ class ActionsCarsError(Exception):
 logger = logging.getLogger("uvicorn.error")
 
 
+CHECK_CAR = Workflow(
+    name="check",
+    steps=(
+        Step(
+            "check",
+            _check,
+            args=("car_id", "garage_client"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+    ),
+)
+
+SEND_FOR_REPAIR = Workflow(
+    name="send_for_repair",
+    steps=(
+        Step(
+            "check",
+            _check,
+            args=("car_id", "garage_client"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "problems_before",
+            _get_problems,
+            args=("car_id", "garage_client"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "add_problem",
+            _add_problem,
+            args=("car_id", "problem", "garage_client"),
+            after=("check", "problems_before"),
+        ),
+        Step(
+            "problems_after",
+            _get_problems,
+            args=("car_id", "garage_client"),
+            after=("add_problem",),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "update_status",
+            _update_status,
+            args=("car_id", "garage_client"),
+            after=("problems_after",),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+    ),
+)
+
+SEND_TO_PARKING = Workflow(
+    name="send_to_parking",
+    steps=(
+        Step(
+            "check",
+            _check,
+            args=("car_id", "garage_client"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "problems_before",
+            _get_problems,
+            args=("car_id", "garage_client"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "fix_problems",
+            _fix_problems,
+            args=("car_id", "garage_client"),
+            after=("check", "problems_before"),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "problems_after",
+            _get_problems,
+            args=("car_id", "garage_client"),
+            after=("fix_problems",),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+        Step(
+            "update_status",
+            _update_status,
+            args=("car_id", "garage_client"),
+            after=("problems_after",),
+            retry=DEFAULT_RETRY_POLICY,
+        ),
+    ),
+)
+
+WORKFLOWS = {
+    schemas.CarActions.check: CHECK_CAR,
+    schemas.CarActions.send_for_repair: SEND_FOR_REPAIR,
+    schemas.CarActions.send_to_parking: SEND_TO_PARKING,
+}
+
+
+def _describe(action: str, car_id: str, problem: str | None = None) -> tuple[str, dict]:
+    if action == schemas.CarActions.check:
+        return f"check {repr(car_id)}", {"car_id": car_id}
+    if action == schemas.CarActions.send_for_repair:
+        name = f"send car {repr(car_id)} for repair with problem {repr(problem)}"
+        return name, {"car_id": car_id, "problem": problem}
+    if action == schemas.CarActions.send_to_parking:
+        return f"send car {repr(car_id)} to parking", {"car_id": car_id}
+    raise ActionsCarsError(f"Unknown action {repr(action)}")
+
+
+async def _enqueue(
+    action: schemas.CarActions,
+    car_id: str,
+    session: AsyncSession,
+    problem: str | None = None,
+    idempotency_keys: IdempotencyKeys | None = None,
+    idempotency_key: str | None = None,
+    admission: AdmissionControl | None = None,
+) -> models.Task:
+    name, payload = _describe(action, car_id, problem)
+    if idempotency_keys is not None and idempotency_key is not None:
+        return await idempotency_keys.enqueue_task(
+            idempotency_key, name, car_id, action, payload, session, admission
+        )
+    if admission is not None:
+        await admission.admit()
+    try:
+        return await enqueue_task(name, car_id, action, payload, session)
+    except BaseException:
+        if admission is not None:
+            admission.release()
+        raise
+
+
 async def check_car(
     car_id: str,
-    garage_client: GarageClient,
-    background_tasks: BackgroundTasks,
     session: AsyncSession,
+    idempotency_keys: IdempotencyKeys | None = None,
+    idempotency_key: str | None = None,
+    admission: AdmissionControl | None = None,
 ) -> models.Task:
-    name = f"check {repr(car_id)}"
-    task = await create_task(name, car_id, session)
-    steps = [partial(_check, car_id, garage_client)]
-    background_tasks.add_task(_run_steps, name, steps, task.id, session)
-    return task
+    return await _enqueue(
+        schemas.CarActions.check,
+        car_id,
+        session,
+        idempotency_keys=idempotency_keys,
+        idempotency_key=idempotency_key,
+        admission=admission,
+    )
 
 
 async def send_for_repair(
     car_id: str,
     problem: str,
-    garage_client: GarageClient,
-    background_tasks: BackgroundTasks,
     session: AsyncSession,
+    idempotency_keys: IdempotencyKeys | None = None,
+    idempotency_key: str | None = None,
+    admission: AdmissionControl | None = None,
 ) -> models.Task:
-    name = f"send car {repr(car_id)} for repair with problem {repr(problem)}"
-    task = await create_task(name, car_id, session)
-    steps = [
-        partial(_check, car_id, garage_client),
-        partial(_get_problems, car_id, garage_client),
-        partial(_add_problem, car_id, problem, garage_client),
-        partial(_get_problems, car_id, garage_client),
-        partial(_update_status, car_id, garage_client),
-    ][::-1]
-    background_tasks.add_task(_run_steps, name, steps, task.id, session)
-    return task
+    return await _enqueue(
+        schemas.CarActions.send_for_repair,
+        car_id,
+        session,
+        problem,
+        idempotency_keys=idempotency_keys,
+        idempotency_key=idempotency_key,
+        admission=admission,
+    )
 
 
 async def send_to_parking(
     car_id: str,
-    garage_client: GarageClient,
-    background_tasks: BackgroundTasks,
     session: AsyncSession,
+    idempotency_keys: IdempotencyKeys | None = None,
+    idempotency_key: str | None = None,
+    admission: AdmissionControl | None = None,
+) -> models.Task:
+    return await _enqueue(
+        schemas.CarActions.send_to_parking,
+        car_id,
+        session,
+        idempotency_keys=idempotency_keys,
+        idempotency_key=idempotency_key,
+        admission=admission,
+    )
+
+
+async def run_bulk_action(
+    action: str,
+    car_ids: list[str],
+    problem: str | None,
+    session: AsyncSession,
+    admission: AdmissionControl | None = None,
+) -> list[int]:
+    if action == schemas.CarActions.send_for_repair and problem is None:
+        raise ActionsCarsError("Problem is required to send cars for repair")
+    items = []
+    for car_id in car_ids:
+        name, payload = _describe(action, car_id, problem)
+        items.append((name, car_id, payload))
+    if admission is not None:
+        await admission.admit(len(items))
+    try:
+        return await enqueue_tasks(action, items, session)
+    except BaseException:
+        if admission is not None:
+            admission.release(len(items))
+        raise
+
+
+async def run_job(
+    job: models.Job,
+    garage_client: GarageClient,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
 ) -> models.Task:
-    name = f"send car {repr(car_id)} to parking"
-    task = await create_task(name, car_id, session)
-    steps = [
-        partial(_check, car_id, garage_client),
-        partial(_get_problems, car_id, garage_client),
-        partial(_fix_problems, car_id, garage_client),
-        partial(_get_problems, car_id, garage_client),
-        partial(_update_status, car_id, garage_client),
-    ][::-1]
-    background_tasks.add_task(_run_steps, name, steps, task.id, session)
-    return task
+    if job.action not in WORKFLOWS:
+        raise ActionsCarsError(f"Unknown action {repr(job.action)}")
+    async with session_maker() as session:
+        task = await session.get(models.Task, job.task_id)
+    if task.status != schemas.TaskStatuses.in_progress:
+        # The workflow finished but its job was not marked done in time.
+        return task
+    context = {"garage_client": MemoGarageClient(garage_client), **job.payload}
+    return await _run_steps(
+        task.name, WORKFLOWS[job.action], context, task.id, session_maker, journal
+    )
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from app import settings
+from app.garage import GarageCircuitOpenError, GarageClientNotFoundError
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _is_transient(err: Exception) -> bool:
+    return not isinstance(
+        err.__cause__, (GarageClientNotFoundError, GarageCircuitOpenError)
+    )
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: before attempt `n + 1` the policy
+    sleeps a random time between 0 and `base_delay * 2 ** (n - 1)`,
+    capped by `max_delay`. Only errors accepted by `is_retryable` are retried.
+    """
+
+    max_attempts: int = settings.RETRY_MAX_ATTEMPTS
+    base_delay: float = settings.RETRY_BASE_DELAY
+    max_delay: float = settings.RETRY_MAX_DELAY
+    is_retryable: Callable[[Exception], bool] = field(default=_is_transient)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        on_retry: Callable[[int, Exception, float], None] | None = None,
+    ) -> Any:
+        attempt = 1
+        while True:
+            try:
+                return await func(*args)
+            except Exception as err:
+                if attempt >= self.max_attempts or not self.is_retryable(err):
+                    raise
+                delay = self.delay(attempt)
+                logger.info("attempt %s failed, retrying in %.2fs", attempt, delay)
+                if on_retry is not None:
+                    on_retry(attempt, err, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -1,29 +1,307 @@
-from typing import Callable
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app import schemas
-from app.repo import create_message, update_task
+from app import metrics, models, profiling, schemas
+from app.journal import MessageJournal
+from app.repo import (
+    create_checkpoints,
+    read_checkpoints,
+    read_reported_steps,
+    update_task,
+)
 
 from ._garage import ActionsGarageError
+from ._retry import RetryPolicy
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    `args` name values of the workflow context passed to `func`:
+    the context holds the workflow parameters and the result of every
+    finished step under the step name. `after` lists steps that must
+    succeed before this one starts. With `retry` set, failed attempts
+    are retried by the policy and each of them is logged to the task.
+    """
+
+    name: str
+    func: Callable[..., Awaitable[tuple[Any, str]]]
+    args: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    retry: RetryPolicy | None = None
+
+    async def run(self, args: list, step_run: "StepRun") -> tuple[Any, str]:
+        start = time.perf_counter()
+        attempt_start = start
+        outcome = schemas.StepOutcomes.failed
+
+        async def attempt(*args):
+            nonlocal attempt_start
+            attempt_start = time.perf_counter()
+            step_run.attempt += 1
+            return await self.func(*args)
+
+        def on_retry(attempt: int, err: Exception, delay: float):
+            step_run.notes.append(
+                (
+                    f"{err} Attempt {attempt} of {self.retry.max_attempts} failed, "
+                    f"retrying in {delay:.2f}s",
+                    attempt,
+                    (time.perf_counter() - attempt_start) * 1000,
+                )
+            )
+
+        try:
+            if self.retry is None:
+                result = await attempt(*args)
+            else:
+                result = await self.retry.call(attempt, *args, on_retry=on_retry)
+            outcome = schemas.StepOutcomes.succeeded
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            step_run.duration_ms = duration * 1000
+            metrics.STEP_SECONDS.observe(duration, step=self.name, outcome=outcome)
+
+
+@dataclass
+class StepRun:
+    """
+    What one run of a step reports to the task: a `(body, attempt,
+    duration_ms)` note for every retried attempt, the number of attempts
+    made and the step duration, retries and backoff included.
+    """
+
+    notes: list[tuple[str, int, float]] = field(default_factory=list)
+    attempt: int = 0
+    duration_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class Workflow:
+    steps: tuple[Step, ...]
+    name: str = "workflow"
+
+    def __post_init__(self):
+        declared = set()
+        for step in self.steps:
+            unknown = set(step.after) - declared
+            if unknown:
+                raise ValueError(
+                    f"Step {repr(step.name)} depends on undeclared steps {unknown}"
+                )
+            declared.add(step.name)
 
 
 async def _run_steps(
-    name: str, steps: list[Callable], task_id: int, session: AsyncSession
-):
+    name: str,
+    workflow: Workflow,
+    context: dict,
+    task_id: int,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+) -> models.Task:
+    """
+    Starts every step as soon as the steps it depends on have succeeded,
+    so independent steps overlap. Messages are still written in the order
+    the steps are declared, and the first failure in that order ends the
+    workflow, which keeps the task log the same as for a linear run.
+    """
+    start = time.perf_counter()
+    metrics.WORKFLOWS_IN_FLIGHT.inc()
+    try:
+        async with profiling.PROFILER.profile("workflow", name):
+            task = await _run_workflow(
+                name, workflow, context, task_id, session_maker, journal
+            )
+    finally:
+        metrics.WORKFLOWS_IN_FLIGHT.dec()
+    metrics.WORKFLOW_SECONDS.observe(
+        time.perf_counter() - start, workflow=workflow.name, outcome=task.status
+    )
+    return task
+
+
+async def _restore(
+    workflow: Workflow,
+    task_id: int,
+    session_maker: async_sessionmaker[AsyncSession],
+) -> tuple[dict[str, tuple[Any, str] | ActionsGarageError], set[str]]:
+    """
+    Reads the checkpoints of an interrupted run: the outcome of every step
+    that already finished and the steps whose messages are already stored.
+    """
+    async with session_maker() as session:
+        checkpoints = await read_checkpoints(task_id, session)
+        reported = await read_reported_steps(task_id, session)
+    step_names = {step.name for step in workflow.steps}
+    outcomes = {}
+    for checkpoint in checkpoints:
+        if checkpoint.step_name not in step_names:
+            continue
+        if checkpoint.outcome == schemas.StepOutcomes.failed:
+            outcomes[checkpoint.step_name] = ActionsGarageError(checkpoint.message)
+        else:
+            outcomes[checkpoint.step_name] = (checkpoint.result, checkpoint.message)
+    return outcomes, reported
+
+
+async def _run_workflow(
+    name: str,
+    workflow: Workflow,
+    context: dict,
+    task_id: int,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+) -> models.Task:
     status = schemas.TaskStatuses.completed
-    is_successful = True
-    _msg = await create_message(f"Start {name}", task_id, session)
-    while steps and is_successful:
-        step_func = steps.pop()
-        msg = None
-        try:
-            _res, msg = await step_func()
-        except ActionsGarageError as err:
+    context = dict(context)
+    outcomes: dict[str, tuple[Any, str] | ActionsGarageError]
+    outcomes, already_reported = await _restore(workflow, task_id, session_maker)
+    for step_name, outcome in outcomes.items():
+        if not isinstance(outcome, ActionsGarageError):
+            context[step_name] = outcome[0]
+    running: dict[asyncio.Task, Step] = {}
+    runs = {step.name: StepRun() for step in workflow.steps}
+    step_indexes = {step.name: index for index, step in enumerate(workflow.steps)}
+    reported = 0
+    resumed = bool(outcomes or already_reported)
+    acks = [journal.append(f"{'Resume' if resumed else 'Start'} {name}", task_id)]
+
+    def report(body: str, step_name: str, outcome: schemas.StepOutcomes):
+        if step_name in already_reported:
+            return
+        step_run = runs[step_name]
+        for note, attempt, duration_ms in step_run.notes:
+            acks.append(
+                journal.append(
+                    note,
+                    task_id,
+                    step_name=step_name,
+                    duration_ms=duration_ms,
+                    attempt=attempt,
+                    outcome=schemas.StepOutcomes.retried,
+                )
+            )
+        # A step restored from its checkpoint did not run this time,
+        # so its duration and attempt are unknown.
+        ran = step_run.attempt > 0
+        acks.append(
+            journal.append(
+                body,
+                task_id,
+                step_name=step_name,
+                duration_ms=step_run.duration_ms if ran else None,
+                attempt=step_run.attempt if ran else None,
+                outcome=outcome,
+            )
+        )
+
+    def report_finished_steps() -> bool:
+        """
+        Reports finished steps in declared order up to the first one still
+        running. Returns False once a failed step was reported.
+        """
+        nonlocal reported
+        while reported < len(workflow.steps):
+            step_name = workflow.steps[reported].name
+            outcome = outcomes.get(step_name)
+            if outcome is None:
+                break
+            reported += 1
+            if isinstance(outcome, ActionsGarageError):
+                report(str(outcome), step_name, schemas.StepOutcomes.failed)
+                return False
+            _res, msg = outcome
+            report(msg, step_name, schemas.StepOutcomes.succeeded)
+        return True
+
+    async def save_checkpoints(steps: list[Step]):
+        checkpoints = []
+        for step in steps:
+            outcome = outcomes[step.name]
+            if isinstance(outcome, ActionsGarageError):
+                result, msg = None, str(outcome)
+                step_outcome = schemas.StepOutcomes.failed
+            else:
+                result, msg = outcome
+                step_outcome = schemas.StepOutcomes.succeeded
+            checkpoints.append(
+                schemas.CheckpointCreate(
+                    task_id=task_id,
+                    step_index=step_indexes[step.name],
+                    step_name=step.name,
+                    result=result,
+                    message=msg,
+                    outcome=step_outcome,
+                )
+            )
+        if checkpoints:
+            async with session_maker() as session:
+                await create_checkpoints(checkpoints, session)
+
+    def report_restored_failure():
+        """
+        Ends a resumed run whose checkpoints hold a failed step. Steps
+        declared before it may not have finished, so the failure is
+        reported even if the steps before it were not.
+        """
+        if not report_finished_steps():
+            return
+        for step in workflow.steps:
+            outcome = outcomes.get(step.name)
+            if isinstance(outcome, ActionsGarageError):
+                report(str(outcome), step.name, schemas.StepOutcomes.failed)
+                return
+
+    def start_ready_steps():
+        started = outcomes.keys() | {step.name for step in running.values()}
+        for step in workflow.steps:
+            if step.name in started:
+                continue
+            if all(
+                dep in outcomes and not isinstance(outcomes[dep], Exception)
+                for dep in step.after
+            ):
+                args = [context[arg] for arg in step.args]
+                future = asyncio.create_task(step.run(args, runs[step.name]))
+                running[future] = step
+
+    try:
+        if any(isinstance(outcome, Exception) for outcome in outcomes.values()):
+            # The run failed before, nothing is started again.
+            report_restored_failure()
             status = schemas.TaskStatuses.failed
-            is_successful = False
-            msg = str(err)
-        finally:
-            _msg = await create_message(msg, task_id, session)
-    _msg = await create_message(f"End {name}", task_id, session)
-    return await update_task(task_id, {"status": status}, session)
+        else:
+            report_finished_steps()
+            start_ready_steps()
+        while running:
+            finished, _pending = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            finished_steps = []
+            for future in finished:
+                step = running.pop(future)
+                finished_steps.append(step)
+                try:
+                    outcomes[step.name] = future.result()
+                    context[step.name] = outcomes[step.name][0]
+                except ActionsGarageError as err:
+                    outcomes[step.name] = err
+            await save_checkpoints(finished_steps)
+            if not report_finished_steps():
+                status = schemas.TaskStatuses.failed
+                break
+            start_ready_steps()
+    finally:
+        for future in running:
+            future.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+    acks.append(journal.append(f"End {name}", task_id))
+    await asyncio.gather(*acks)
+    async with session_maker() as session:
+        return await update_task(task_id, {"status": status}, session)
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import metrics, repo, settings
+
+
+class AdmissionRejectedError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionStats:
+    queue_depth: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    refreshes: int = 0
+
+
+class AdmissionControl:
+    """
+    Caps pending workflows, queued and running jobs together, at
+    `max_pending`. Running ones are already capped by the job workers,
+    so the cap bounds the queue a spike can build up.
+
+    The depth is read from the jobs table, so the cap holds across API
+    and worker processes. It is refreshed at most every `refresh_interval`
+    seconds and counted up locally for every admitted workflow in between.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        max_pending: int = settings.ADMISSION_MAX_PENDING_JOBS,
+        refresh_interval: float = settings.ADMISSION_REFRESH_SECONDS,
+        retry_after: int = settings.ADMISSION_RETRY_AFTER_SECONDS,
+    ):
+        self.session_maker = session_maker
+        self.max_pending = max_pending
+        self.refresh_interval = refresh_interval
+        self.retry_after = retry_after
+        self.stats = AdmissionStats()
+        self._refreshed_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if (
+                self._refreshed_at is not None
+                and now - self._refreshed_at < self.refresh_interval
+            ):
+                return
+            async with self.session_maker() as session:
+                self.stats.queue_depth = await repo.count_pending_jobs(session)
+            self._refreshed_at = time.monotonic()
+            self.stats.refreshes += 1
+            metrics.WORKFLOW_QUEUE_DEPTH.set(self.stats.queue_depth)
+
+    async def admit(self, count: int = 1) -> None:
+        """
+        Reserves room for `count` workflows or raises
+        `AdmissionRejectedError` when they do not fit.
+        """
+        await self._refresh()
+        if self.stats.queue_depth + count > self.max_pending:
+            self.stats.rejected += count
+            metrics.WORKFLOW_ADMISSION_REJECTIONS.inc(count)
+            raise AdmissionRejectedError(
+                f"Too many pending workflows: {self.stats.queue_depth} "
+                f"of {self.max_pending}, retry in {self.retry_after}s",
+                self.retry_after,
+            )
+        self.stats.queue_depth += count
+        self.stats.admitted += count
+        metrics.WORKFLOW_QUEUE_DEPTH.set(self.stats.queue_depth)
+
+    def release(self, count: int = 1) -> None:
+        """
+        Gives back the room of `count` admitted workflows that were not
+        enqueued after all.
+        """
+        self.stats.queue_depth = max(self.stats.queue_depth - count, 0)
+        self.stats.admitted -= count
+        metrics.WORKFLOW_QUEUE_DEPTH.set(self.stats.queue_depth)
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, TypeVar
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how many connections were checked out
+    and how long callers waited for them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.stats.wait_seconds_total += wait
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, wait)
+        self.stats.checkouts += 1
+        return connection
+
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    # busy_timeout goes first, so switching to WAL waits for other
+    # connections instead of failing with `database is locked`.
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.DB_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA journal_mode = {settings.DB_JOURNAL_MODE}",
+        f"PRAGMA synchronous = {settings.DB_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {int(settings.DB_MMAP_SIZE)}",
+        f"PRAGMA cache_size = {int(settings.DB_CACHE_SIZE)}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def create_engine(url: str = settings.DB_URL, read_only: bool = False) -> AsyncEngine:
+    """
+    A writer engine has a single connection, so writes of the process are
+    serialized in the pool instead of failing on the SQLite write lock.
+    Commits go through `run_to_completion`, so a cancelled request cannot
+    take that connection down with it.
+    A read-only engine has a pool of `query_only` connections.
+    """
+    if read_only:
+        pool_size, max_overflow = (
+            settings.DB_READ_POOL_SIZE,
+            settings.DB_READ_MAX_OVERFLOW,
+        )
+    else:
+        pool_size, max_overflow = 1, 0
+    engine = create_async_engine(
+        url=url,
+        connect_args=settings.CONNECT_ARGS,
+        poolclass=InstrumentedPool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+class RoutingSession(Session):
+    """
+    Sends SELECT statements to the `reader` engine and everything else
+    to the bound writer engine. Once a transaction wrote, it stays on
+    the writer until it ends, so it reads its own uncommitted changes.
+    Write transactions therefore always start with a write and never
+    have to upgrade a read lock.
+    """
+
+    def __init__(self, *args, reader: Engine | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reader = reader
+        self._writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if (
+            self.reader is not None
+            and not self._writing
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            return self.reader
+        self._writing = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _stop_writing(session: RoutingSession, transaction: SessionTransaction):
+    if transaction.parent is None:
+        session._writing = False
+
+
+def create_session_maker(
+    engine: AsyncEngine, read_engine: AsyncEngine | None = None
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        reader=read_engine.sync_engine if read_engine is not None else None,
+        expire_on_commit=False,
+        autoflush=True,
+    )
+
+
+async def run_to_completion(awaitable: Awaitable[T]) -> T:
+    """
+    Awaits `awaitable` to the end even if the caller is cancelled, and
+    passes the cancellation on afterwards. A commit cancelled halfway
+    leaves its connection inside a transaction: the pool drops it without
+    closing it, and its write lock blocks every later write.
+    """
+    task = asyncio.ensure_future(awaitable)
+    cancelled = False
+    while True:
+        try:
+            result = await asyncio.shield(task)
+            break
+        except asyncio.CancelledError:
+            if task.done():
+                raise
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError
+    return result
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, InstrumentedPool):
+        stats.update(asdict(pool.stats))
+    return stats
@@ -1,39 +1,98 @@
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import (
-    AsyncEngine,
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
+from fastapi import Depends, Header, Request
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from app import settings
-from app.garage import GarageClient
+from app.admission import AdmissionControl
+from app.events import TaskEventHub
+from app.garage import GarageClient, GuardedGarageClient
+from app.idempotency import IdempotencyKeys
+from app.jobs import JobQueue
+from app.journal import MessageJournal
 
 
-def get_garage_client():
-    return GarageClient()
+def get_garage_client(request: Request) -> GarageClient:
+    return request.app.state.garage_client
 
 
 GarageClientDepends = Annotated[GarageClient, Depends(get_garage_client)]
 
 
-async def get_sql_engine() -> AsyncEngine:
-    engine = create_async_engine(
-        url=settings.DB_URL,
-        connect_args=settings.CONNECT_ARGS,
-    )
-    return engine
+def get_garage_guard(request: Request) -> GuardedGarageClient:
+    return request.app.state.garage_guard
+
+
+GarageGuardDepends = Annotated[GuardedGarageClient, Depends(get_garage_guard)]
+
+
+def get_sql_engine(request: Request) -> AsyncEngine:
+    return request.app.state.engine
 
 
 EngineDepends = Annotated[AsyncEngine, Depends(get_sql_engine)]
 
 
-async def get_session(engine: EngineDepends) -> AsyncGenerator[AsyncSession, None]:
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
-    async with async_session() as session:
+def get_read_engine(request: Request) -> AsyncEngine:
+    return request.app.state.read_engine
+
+
+ReadEngineDepends = Annotated[AsyncEngine, Depends(get_read_engine)]
+
+
+def get_session_maker(request: Request) -> async_sessionmaker[AsyncSession]:
+    return request.app.state.session_maker
+
+
+SessionMakerDepends = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_session_maker)
+]
+
+
+async def get_session(
+    session_maker: SessionMakerDepends,
+) -> AsyncGenerator[AsyncSession, None]:
+    async with session_maker() as session:
         yield session
 
 
 SessionDepends = Annotated[AsyncSession, Depends(get_session)]
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+
+JobQueueDepends = Annotated[JobQueue, Depends(get_job_queue)]
+
+
+def get_journal(request: Request) -> MessageJournal:
+    return request.app.state.journal
+
+
+JournalDepends = Annotated[MessageJournal, Depends(get_journal)]
+
+
+def get_events(request: Request) -> TaskEventHub:
+    return request.app.state.events
+
+
+EventsDepends = Annotated[TaskEventHub, Depends(get_events)]
+
+
+def get_admission(request: Request) -> AdmissionControl:
+    return request.app.state.admission
+
+
+AdmissionDepends = Annotated[AdmissionControl, Depends(get_admission)]
+
+
+def get_idempotency_keys(request: Request) -> IdempotencyKeys:
+    return request.app.state.idempotency_keys
+
+
+IdempotencyKeysDepends = Annotated[IdempotencyKeys, Depends(get_idempotency_keys)]
+
+IdempotencyKeyHeader = Annotated[
+    str | None, Header(min_length=1, max_length=settings.IDEMPOTENCY_KEY_MAX_LENGTH)
+]
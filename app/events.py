@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models, repo, schemas, settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Subscription:
+    def __init__(self, hub: "TaskEventHub", task_id: int):
+        self.hub = hub
+        self.task_id = task_id
+        self.dropped = False
+        self.queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue(
+            maxsize=settings.EVENTS_QUEUE_SIZE
+        )
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class TaskEventHub:
+    """
+    In-process pub/sub of task progress: message and status events
+    are fanned out to everyone subscribed to the task.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, task_id: int) -> Subscription:
+        subscription = Subscription(self, task_id)
+        self._subscriptions[task_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.task_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.task_id]
+
+    def publish(self, task_id: int, kind: str, data: dict) -> None:
+        for subscription in list(self._subscriptions.get(task_id, ())):
+            try:
+                subscription.queue.put_nowait((kind, data))
+            except asyncio.QueueFull:
+                logger.warning("dropping slow subscriber of task %s", task_id)
+                subscription.dropped = True
+                subscription.close()
+
+    def publish_message(self, message: models.Message) -> None:
+        data = schemas.Message.model_validate(message).model_dump(mode="json")
+        self.publish(message.task_id, "message", data)
+
+    def publish_status(self, task: models.Task) -> None:
+        self.publish(task.id, "status", {"task_id": task.id, "status": task.status})
+
+
+def _format_event(kind: str, data: dict, event_id: int | None = None) -> str:
+    lines = [f"event: {kind}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _format_message(message: models.Message) -> str:
+    data = schemas.Message.model_validate(message).model_dump(mode="json")
+    return _format_event("message", data, message.id)
+
+
+async def stream_task_events(
+    task: models.Task,
+    subscription: Subscription,
+    keepalive_seconds: float = settings.EVENTS_KEEPALIVE_SECONDS,
+) -> AsyncGenerator[str, None]:
+    """
+    Replays messages already stored for the task, then streams live events
+    until the task gets its final status. The subscription must be opened
+    before the task is read so nothing falls between the two.
+    """
+    try:
+        last_id = 0
+        for message in task.messages:
+            yield _format_message(message)
+            last_id = message.id
+        if task.status != schemas.TaskStatuses.in_progress:
+            yield _format_event("status", {"task_id": task.id, "status": task.status})
+            return
+        while True:
+            try:
+                kind, data = await asyncio.wait_for(
+                    subscription.queue.get(), keepalive_seconds
+                )
+            except TimeoutError:
+                if subscription.dropped:
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if kind == "message":
+                if data["id"] <= last_id:
+                    continue
+                yield _format_event(kind, data, data["id"])
+            else:
+                yield _format_event(kind, data)
+                return
+    finally:
+        subscription.close()
+
+
+async def poll_task_events(
+    task: models.Task,
+    session_maker: async_sessionmaker[AsyncSession],
+    poll_interval: float = settings.EVENTS_POLL_INTERVAL,
+    keepalive_seconds: float = settings.EVENTS_KEEPALIVE_SECONDS,
+) -> AsyncGenerator[str, None]:
+    """
+    Streams the events of a task run by another process, where the
+    in-process hub never sees them: new messages and the status are read
+    from the database every `poll_interval` seconds until the task gets
+    its final status.
+    """
+    last_id = 0
+    status = task.status
+    messages = task.messages
+    last_sent = time.monotonic()
+    while True:
+        for message in messages:
+            yield _format_message(message)
+            last_id = message.id
+            last_sent = time.monotonic()
+        if status != schemas.TaskStatuses.in_progress:
+            yield _format_event("status", {"task_id": task.id, "status": status})
+            return
+        if time.monotonic() - last_sent >= keepalive_seconds:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(poll_interval)
+        async with session_maker() as session:
+            # The status goes first: messages are stored before the final
+            # status, so none are missed once it is read.
+            status = await repo.read_task_status(task.id, session)
+            messages = await repo.read_task_messages(task.id, last_id, session)
@@ -0,0 +1,12 @@
+from ._batch import BatchingGarageClient
+from ._breaker import (
+    CircuitBreaker,
+    CircuitStates,
+    GarageBulkheadFullError,
+    GarageCircuitOpenError,
+    GuardedGarageClient,
+)
+from ._cache import CachedGarageClient
+from ._client import GarageClient, GarageClientError, GarageClientNotFoundError
+from ._memo import MemoGarageClient
+from ._metrics import InstrumentedGarageClient
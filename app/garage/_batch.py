@@ -0,0 +1,106 @@
+import asyncio
+
+from app import settings
+from app.schemas import CarList
+
+from ._client import GarageClient, GarageClientError, GarageClientNotFoundError
+
+_BATCHED_OPERATIONS = {"check": "check_many", "get_problems": "get_problems_many"}
+
+
+class BatchingGarageClient:
+    """
+    Collects single-car `check` and `get_problems` calls issued within
+    `window` seconds and sends them as one `check_many` / `get_problems_many`
+    call. A batch is sent right away once it holds `max_batch_size` cars.
+    """
+
+    def __init__(
+        self,
+        client: GarageClient,
+        window: float = settings.GARAGE_BATCH_WINDOW,
+        max_batch_size: int = settings.GARAGE_BATCH_MAX_SIZE,
+    ):
+        self.client = client
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.batches_sent = 0
+        self._pending: dict[str, dict[str, asyncio.Future]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._sending: set[asyncio.Task] = set()
+
+    async def _submit(self, operation: str, car_id: str) -> dict:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(operation, {})
+        if car_id not in pending:
+            pending[car_id] = loop.create_future()
+        future = pending[car_id]
+        if len(pending) >= self.max_batch_size:
+            self._flush(operation)
+        elif operation not in self._timers:
+            self._timers[operation] = loop.call_later(
+                self.window, self._flush, operation
+            )
+        value = await asyncio.shield(future)
+        if value is None:
+            raise GarageClientNotFoundError(f"Car {car_id} does not exist!")
+        return {car_id: value}
+
+    def _flush(self, operation: str) -> None:
+        timer = self._timers.pop(operation, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(operation, {})
+        if not pending:
+            return
+        sending = asyncio.create_task(self._send(operation, pending))
+        self._sending.add(sending)
+        sending.add_done_callback(self._sending.discard)
+
+    async def _send(self, operation: str, pending: dict[str, asyncio.Future]) -> None:
+        self.batches_sent += 1
+        try:
+            results = await getattr(self.client, _BATCHED_OPERATIONS[operation])(
+                list(pending)
+            )
+        except asyncio.CancelledError:
+            # A cancelled batch must not leave its callers waiting forever.
+            self._fail(
+                pending, GarageClientError(f"Garage {operation} batch was cancelled")
+            )
+            raise
+        except Exception as err:
+            self._fail(pending, err)
+            return
+        for car_id, future in pending.items():
+            if not future.done():
+                future.set_result(results.get(car_id))
+
+    def _fail(self, pending: dict[str, asyncio.Future], err: Exception) -> None:
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(err)
+
+    async def get_car_list(self) -> CarList:
+        return await self.client.get_car_list()
+
+    async def check(self, car_id: str) -> dict:
+        return await self._submit("check", car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        return await self._submit("get_problems", car_id)
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self.client.check_many(car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        return await self.client.get_problems_many(car_ids)
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        return await self.client.add_problem(car_id, problem)
+
+    async def fix_problems(self, car_id: str) -> dict:
+        return await self.client.fix_problems(car_id)
+
+    async def update_status(self, car_id: str) -> dict:
+        return await self.client.update_status(car_id)
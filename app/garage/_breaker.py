@@ -0,0 +1,214 @@
+import asyncio
+import enum
+import time
+from collections import deque
+
+from app import settings
+from app.schemas import CarList
+
+from ._client import GarageClient, GarageClientError, GarageClientNotFoundError
+
+
+class GarageCircuitOpenError(GarageClientError):
+    pass
+
+
+class GarageBulkheadFullError(GarageClientError):
+    pass
+
+
+class CircuitStates(enum.StrEnum):
+    closed = "closed"
+    open = "open"
+    half_open = "half open"
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over the last `window_size` calls reaches
+    `failure_rate_threshold` (once at least `min_calls` were made).
+    After `open_seconds` it lets `half_open_max_calls` trial calls through:
+    a success closes it again, a failure opens it for another period.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = settings.GARAGE_BREAKER_FAILURE_RATE,
+        window_size: int = settings.GARAGE_BREAKER_WINDOW_SIZE,
+        min_calls: int = settings.GARAGE_BREAKER_MIN_CALLS,
+        open_seconds: float = settings.GARAGE_BREAKER_OPEN_SECONDS,
+        half_open_max_calls: int = settings.GARAGE_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitStates.closed
+        self.rejected = 0
+        self._results: deque[bool] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._trial_calls = 0
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._results:
+            return 0.0
+        return self._results.count(False) / len(self._results)
+
+    def before_call(self) -> None:
+        if self.state == CircuitStates.open:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                raise GarageCircuitOpenError("Garage circuit is open!")
+            self.state = CircuitStates.half_open
+            self._trial_calls = 0
+        if self.state == CircuitStates.half_open:
+            if self._trial_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise GarageCircuitOpenError("Garage circuit is half open!")
+            self._trial_calls += 1
+
+    def release_call(self) -> None:
+        """
+        Frees the trial slot of a call that ended without an outcome,
+        e.g. cancelled or rejected by its bulkhead.
+        """
+        if self.state == CircuitStates.half_open:
+            self._trial_calls = max(self._trial_calls - 1, 0)
+
+    def record_success(self) -> None:
+        if self.state == CircuitStates.half_open:
+            self.state = CircuitStates.closed
+            self._results.clear()
+        self._results.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitStates.half_open:
+            self._open()
+            return
+        self._results.append(False)
+        if (
+            len(self._results) >= self.min_calls
+            and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = CircuitStates.open
+        self._opened_at = time.monotonic()
+        self._results.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": self.failure_rate,
+            "calls_in_window": len(self._results),
+            "rejected": self.rejected,
+        }
+
+
+class Bulkhead:
+    def __init__(self, limit: int, timeout: float = settings.GARAGE_BULKHEAD_TIMEOUT):
+        self.limit = limit
+        self.timeout = timeout
+        self.in_use = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __aenter__(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise GarageBulkheadFullError("Garage bulkhead is full!")
+        self.in_use += 1
+
+    async def __aexit__(self, *exc_info):
+        self.in_use -= 1
+        self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {"limit": self.limit, "in_use": self.in_use, "rejected": self.rejected}
+
+
+class GuardedGarageClient:
+    """
+    Runs every garage operation through its own bulkhead, so a storm of one
+    operation cannot take all the capacity, and through a shared circuit
+    breaker, so calls fail fast while the garage is unhealthy.
+
+    Behind a `BatchingGarageClient` a bulkhead slot is one garage request,
+    a whole batch, so the `check` / `get_problems` limits only apply to
+    reads that are not batched.
+    """
+
+    def __init__(
+        self,
+        client: GarageClient,
+        breaker: CircuitBreaker | None = None,
+        bulkhead_limits: dict[str, int] = settings.GARAGE_BULKHEAD_LIMITS,
+        bulkhead_timeout: float = settings.GARAGE_BULKHEAD_TIMEOUT,
+    ):
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+        self.bulkheads = {
+            operation: Bulkhead(limit, bulkhead_timeout)
+            for operation, limit in bulkhead_limits.items()
+        }
+
+    async def _call(self, operation: str, *args):
+        # The breaker goes first, so an open circuit fails fast instead of
+        # waiting for a bulkhead slot.
+        self.breaker.before_call()
+        recorded = False
+        try:
+            async with self.bulkheads[operation]:
+                try:
+                    result = await getattr(self.client, operation)(*args)
+                except GarageClientNotFoundError:
+                    recorded = True
+                    self.breaker.record_success()
+                    raise
+                except Exception:
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise
+                recorded = True
+                self.breaker.record_success()
+                return result
+        finally:
+            if not recorded:
+                self.breaker.release_call()
+
+    def snapshot(self) -> dict:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "bulkheads": {
+                operation: bulkhead.snapshot()
+                for operation, bulkhead in self.bulkheads.items()
+            },
+        }
+
+    async def get_car_list(self) -> CarList:
+        return await self._call("get_car_list")
+
+    async def check(self, car_id: str) -> dict:
+        return await self._call("check", car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        return await self._call("get_problems", car_id)
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self._call("check_many", car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        return await self._call("get_problems_many", car_ids)
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        return await self._call("add_problem", car_id, problem)
+
+    async def fix_problems(self, car_id: str) -> dict:
+        return await self._call("fix_problems", car_id)
+
+    async def update_status(self, car_id: str) -> dict:
+        return await self._call("update_status", car_id)
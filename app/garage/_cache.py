@@ -0,0 +1,115 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from app import settings
+from app.schemas import CarList
+
+from ._client import GarageClient
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    invalidations: int = 0
+    reads_coalesced: int = 0
+
+
+class CachedGarageClient:
+    """
+    Caches the car list for `ttl` seconds and lets concurrent misses share
+    one in-flight call. Mutating calls invalidate the cached list.
+
+    Concurrent `check` and `get_problems` calls for the same car share one
+    in-flight call too, unless the car was mutated after that call started.
+    """
+
+    def __init__(self, client: GarageClient, ttl: float = settings.GARAGE_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._car_list: CarList | None = None
+        self._expires_at = 0.0
+        self._in_flight: asyncio.Task | None = None
+        self._generation = 0
+        self._reads_in_flight: dict[tuple[str, str], tuple[int, asyncio.Task]] = {}
+        self._car_generations: dict[str, int] = {}
+
+    def invalidate(self) -> None:
+        self._car_list = None
+        self._in_flight = None
+        self._generation += 1
+        self.stats.invalidations += 1
+
+    def invalidate_car(self, car_id: str) -> None:
+        self._car_generations[car_id] = self._car_generations.get(car_id, 0) + 1
+        self.invalidate()
+
+    async def _read(self, operation: str, car_id: str) -> dict:
+        key = (operation, car_id)
+        generation = self._car_generations.get(car_id, 0)
+        if key in self._reads_in_flight:
+            in_flight_generation, in_flight = self._reads_in_flight[key]
+            if in_flight_generation == generation:
+                self.stats.reads_coalesced += 1
+                return await asyncio.shield(in_flight)
+        in_flight = asyncio.create_task(getattr(self.client, operation)(car_id))
+        self._reads_in_flight[key] = (generation, in_flight)
+        try:
+            return await asyncio.shield(in_flight)
+        finally:
+            if self._reads_in_flight.get(key, (None, None))[1] is in_flight:
+                del self._reads_in_flight[key]
+
+    async def get_car_list(self) -> CarList:
+        if self._car_list is not None and time.monotonic() < self._expires_at:
+            self.stats.hits += 1
+            return self._car_list
+        if self._in_flight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(self._in_flight)
+        self.stats.misses += 1
+        generation = self._generation
+        in_flight = asyncio.create_task(self.client.get_car_list())
+        self._in_flight = in_flight
+        try:
+            car_list = await asyncio.shield(in_flight)
+        finally:
+            if self._in_flight is in_flight:
+                self._in_flight = None
+        if generation == self._generation:
+            self._car_list = car_list
+            self._expires_at = time.monotonic() + self.ttl
+        return car_list
+
+    async def check(self, car_id: str) -> dict:
+        return await self._read("check", car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        return await self._read("get_problems", car_id)
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self.client.check_many(car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        return await self.client.get_problems_many(car_ids)
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        try:
+            return await self.client.add_problem(car_id, problem)
+        finally:
+            self.invalidate_car(car_id)
+
+    async def fix_problems(self, car_id: str) -> dict:
+        try:
+            return await self.client.fix_problems(car_id)
+        finally:
+            self.invalidate_car(car_id)
+
+    async def update_status(self, car_id: str) -> dict:
+        try:
+            return await self.client.update_status(car_id)
+        finally:
+            self.invalidate_car(car_id)
@@ -8,6 +8,10 @@ class GarageClientError(Exception):
     pass
 
 
+class GarageClientNotFoundError(GarageClientError):
+    pass
+
+
 def _random_with_probability(probability: int) -> bool:
     """
     Probability - the chance in percent (an integer from 0 to 100) with which the function will return True.
@@ -42,14 +46,32 @@ class GarageClient:
         await asyncio.sleep(self.SLEEP_DURATION)
         if car_id in self.car_db:
             return {car_id: True}
-        raise GarageClientError(f"Car {car_id} does not exist!")
+        raise GarageClientNotFoundError(f"Car {car_id} does not exist!")
 
     async def get_problems(self, car_id: str) -> dict:
         await asyncio.sleep(self.SLEEP_DURATION)
         if car_id in self.car_db:
             car = self.car_db[car_id]
             return {car_id: car["problems"]}
-        raise GarageClientError(f"Car {car_id} does not exist!")
+        raise GarageClientNotFoundError(f"Car {car_id} does not exist!")
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        """
+        Checks all cars in one round trip. Missing cars are left out of the result.
+        """
+        await asyncio.sleep(self.SLEEP_DURATION)
+        return {car_id: True for car_id in car_ids if car_id in self.car_db}
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        """
+        Gets problems of all cars in one round trip. Missing cars are left out of the result.
+        """
+        await asyncio.sleep(self.SLEEP_DURATION)
+        return {
+            car_id: self.car_db[car_id]["problems"]
+            for car_id in car_ids
+            if car_id in self.car_db
+        }
 
     async def add_problem(self, car_id: str, problem: str) -> dict:
         await asyncio.sleep(self.SLEEP_DURATION)
@@ -57,7 +79,7 @@ class GarageClient:
             car = self.car_db[car_id]
             car["problems"].append(problem)
             return {car_id: car["problems"]}
-        raise GarageClientError(f"Car {car_id} does not exist!")
+        raise GarageClientNotFoundError(f"Car {car_id} does not exist!")
 
     async def fix_problems(self, car_id: str) -> dict:
         await asyncio.sleep(self.SLEEP_DURATION)
@@ -65,7 +87,7 @@ class GarageClient:
             car = self.car_db[car_id]
             car["problems"] = []
             return {car_id: car["problems"]}
-        raise GarageClientError(f"Car {car_id} does not exist!")
+        raise GarageClientNotFoundError(f"Car {car_id} does not exist!")
 
     async def update_status(self, car_id: str) -> dict:
         await asyncio.sleep(self.SLEEP_DURATION)
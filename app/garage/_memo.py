@@ -0,0 +1,74 @@
+import asyncio
+
+from app.schemas import CarList
+
+from ._client import GarageClient
+
+
+class MemoGarageClient:
+    """
+    Remembers `check` and `get_problems` results for the life of one
+    workflow. A mutation of a car drops its remembered problems, and
+    `add_problem` / `fix_problems` remember the problems they return,
+    so a following `get_problems` of that car needs no garage call.
+    """
+
+    def __init__(self, client: GarageClient):
+        self.client = client
+        self.hits = 0
+        self._memo: dict[tuple[str, str], asyncio.Future] = {}
+
+    async def _read(self, operation: str, car_id: str) -> dict:
+        key = (operation, car_id)
+        if key in self._memo:
+            self.hits += 1
+            return await asyncio.shield(self._memo[key])
+        future = asyncio.ensure_future(getattr(self.client, operation)(car_id))
+        self._memo[key] = future
+        try:
+            return await asyncio.shield(future)
+        except BaseException:
+            if self._memo.get(key) is future:
+                del self._memo[key]
+            raise
+
+    def _remember_problems(self, car_id: str, problems: dict | None) -> None:
+        self._memo.pop(("get_problems", car_id), None)
+        if problems is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(problems)
+            self._memo[("get_problems", car_id)] = future
+
+    async def get_car_list(self) -> CarList:
+        return await self.client.get_car_list()
+
+    async def check(self, car_id: str) -> dict:
+        return await self._read("check", car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        return await self._read("get_problems", car_id)
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self.client.check_many(car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        return await self.client.get_problems_many(car_ids)
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        problems = None
+        try:
+            problems = await self.client.add_problem(car_id, problem)
+            return problems
+        finally:
+            self._remember_problems(car_id, problems)
+
+    async def fix_problems(self, car_id: str) -> dict:
+        problems = None
+        try:
+            problems = await self.client.fix_problems(car_id)
+            return problems
+        finally:
+            self._remember_problems(car_id, problems)
+
+    async def update_status(self, car_id: str) -> dict:
+        return await self.client.update_status(car_id)
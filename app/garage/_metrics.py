@@ -0,0 +1,48 @@
+from app import metrics
+from app.schemas import CarList
+
+from ._client import GarageClient
+
+
+class InstrumentedGarageClient:
+    """
+    Records the latency of every garage call and counts failed calls
+    by operation and error type.
+    """
+
+    def __init__(self, client: GarageClient):
+        self.client = client
+
+    async def _call(self, operation: str, *args):
+        try:
+            with metrics.GARAGE_CALL_SECONDS.time(operation=operation):
+                return await getattr(self.client, operation)(*args)
+        except Exception as err:
+            metrics.GARAGE_CALL_ERRORS.inc(
+                operation=operation, error=type(err).__name__
+            )
+            raise
+
+    async def get_car_list(self) -> CarList:
+        return await self._call("get_car_list")
+
+    async def check(self, car_id: str) -> dict:
+        return await self._call("check", car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        return await self._call("get_problems", car_id)
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self._call("check_many", car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        return await self._call("get_problems_many", car_ids)
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        return await self._call("add_problem", car_id, problem)
+
+    async def fix_problems(self, car_id: str) -> dict:
+        return await self._call("fix_problems", car_id)
+
+    async def update_status(self, car_id: str) -> dict:
+        return await self._call("update_status", car_id)
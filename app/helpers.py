@@ -1,33 +1,114 @@
+import base64
+import binascii
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app import settings
+from app import db, settings
+from app.admission import AdmissionControl
+from app.events import TaskEventHub
+from app.garage import (
+    BatchingGarageClient,
+    CachedGarageClient,
+    GarageClient,
+    GuardedGarageClient,
+    InstrumentedGarageClient,
+)
+from app.idempotency import IdempotencyKeys
+from app.jobs import JobQueue
+from app.journal import MessageJournal
+from app.retention import Retention
 
 
 def get_current_time() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-async def init_db_state(app: FastAPI) -> None:
-    async_engine = create_async_engine(
-        url=settings.DB_URL,
-        connect_args=settings.CONNECT_ARGS,
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        prefix, _, last_id = base64.urlsafe_b64decode(cursor).decode().partition(":")
+        if prefix != "id":
+            raise ValueError
+        return int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor {repr(cursor)}")
+
+
+async def init_db_state(app: FastAPI, url: str = settings.DB_URL) -> None:
+    app.state.engine = db.create_engine(url)
+    app.state.read_engine = db.create_engine(url, read_only=True)
+    app.state.session_maker = db.create_session_maker(
+        app.state.engine, app.state.read_engine
     )
-    app.state.engine = async_engine
-    session_maker = async_sessionmaker(
-        bind=async_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autoflush=True,
+    app.state.idempotency_keys = IdempotencyKeys()
+
+
+def create_garage_clients(
+    client: GarageClient | None = None,
+) -> tuple[GuardedGarageClient, CachedGarageClient]:
+    """
+    Batching sits above the guard, so the guard sees the requests that
+    actually reach the garage: single-car reads arrive as `check_many` /
+    `get_problems_many`, and their bulkheads are the limits that apply.
+    """
+    guard = GuardedGarageClient(InstrumentedGarageClient(client or GarageClient()))
+    return guard, CachedGarageClient(BatchingGarageClient(guard))
+
+
+def init_garage_state(app: FastAPI, client: GarageClient | None = None) -> None:
+    app.state.garage_guard, app.state.garage_client = create_garage_clients(client)
+
+
+async def start_job_queue(app: FastAPI, events: TaskEventHub | None = None) -> None:
+    app.state.events = events or TaskEventHub()
+    app.state.journal = MessageJournal(app.state.session_maker, events=app.state.events)
+    await app.state.journal.start()
+    app.state.job_queue = JobQueue(
+        app.state.session_maker,
+        app.state.journal,
+        app.state.garage_client,
+        events=app.state.events,
     )
+    app.state.admission = AdmissionControl(app.state.session_maker)
+    if settings.JOB_RUN_IN_API:
+        await app.state.job_queue.resume()
+        await app.state.job_queue.start()
+
+
+async def stop_job_queue(app: FastAPI) -> None:
+    await app.state.job_queue.stop()
+    await app.state.journal.stop()
+
+
+async def start_retention(app: FastAPI) -> None:
+    app.state.retention = None
+    if settings.RETENTION_ENABLED:
+        app.state.retention = Retention(app.state.session_maker)
+        await app.state.retention.start()
+
+
+async def stop_retention(app: FastAPI) -> None:
+    if app.state.retention is not None:
+        await app.state.retention.stop()
+
 
-    app.state.session_maker = session_maker
+async def close_db_state(app: FastAPI) -> None:
+    await app.state.read_engine.dispose()
+    await app.state.engine.dispose()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db_state(app)
+    await init_db_state(app, settings.DB_URL)
+    init_garage_state(app)
+    await start_job_queue(app)
+    await start_retention(app)
     yield
+    await stop_retention(app)
+    await stop_job_queue(app)
+    await close_db_state(app)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, repo, schemas, settings
+from app.admission import AdmissionControl, AdmissionRejectedError
+
+
+class IdempotencyKeyReusedError(Exception):
+    pass
+
+
+@dataclass
+class IdempotencyStats:
+    hits: int = 0
+    misses: int = 0
+    replays: int = 0
+    conflicts: int = 0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    fingerprint: str
+    task_id: int
+    created_at: datetime
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def fingerprint(action: str, payload: dict) -> str:
+    data = json.dumps({"action": action, "payload": payload}, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class IdempotencyKeys:
+    """
+    Remembers for `window` seconds which task was created with an
+    `Idempotency-Key`, so a retried request gets the original task back
+    instead of scheduling the workflow again.
+
+    The key is stored with the task in one transaction and its unique
+    index catches duplicates, so a new key costs no extra query. Recent
+    keys are kept in an LRU of `cache_size` entries in front of the table.
+    """
+
+    def __init__(
+        self,
+        window: float = settings.IDEMPOTENCY_WINDOW_SECONDS,
+        cache_size: int = settings.IDEMPOTENCY_CACHE_SIZE,
+    ):
+        self.window = timedelta(seconds=window)
+        self.cache_size = cache_size
+        self.stats = IdempotencyStats()
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, key: str) -> _Entry | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry.created_at < _utcnow() - self.window:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    async def _replay(
+        self, key: str, entry: _Entry, request_fingerprint: str, session: AsyncSession
+    ) -> models.Task | None:
+        if entry.fingerprint != request_fingerprint:
+            self.stats.conflicts += 1
+            raise IdempotencyKeyReusedError(
+                f"Idempotency key {repr(key)} was used for another request"
+            )
+        task = await session.get(models.Task, entry.task_id)
+        if task is None:
+            self._cache.pop(key, None)
+            return None
+        self.stats.replays += 1
+        return task
+
+    async def _replay_stored(
+        self, key: str, request_fingerprint: str, session: AsyncSession
+    ) -> models.Task | None:
+        stored = await repo.read_idempotency_key(key, session)
+        if stored is None or stored.created_at < _utcnow() - self.window:
+            return None
+        entry = _Entry(stored.fingerprint, stored.task_id, stored.created_at)
+        self._remember(key, entry)
+        return await self._replay(key, entry, request_fingerprint, session)
+
+    async def enqueue_task(
+        self,
+        key: str,
+        name: str,
+        car_id: str,
+        action: str,
+        payload: dict,
+        session: AsyncSession,
+        admission: AdmissionControl | None = None,
+    ) -> models.Task:
+        """
+        Returns the task of an earlier request with the same key, or
+        enqueues a new one. Only a new task is charged to `admission`,
+        so a retried request is answered even when the queue is full.
+        """
+        request_fingerprint = fingerprint(action, payload)
+        entry = self._cached(key)
+        if entry is not None:
+            self.stats.hits += 1
+            task = await self._replay(key, entry, request_fingerprint, session)
+            if task is not None:
+                return task
+        else:
+            self.stats.misses += 1
+        if admission is not None:
+            try:
+                await admission.admit()
+            except AdmissionRejectedError:
+                task = await self._replay_stored(key, request_fingerprint, session)
+                if task is None:
+                    raise
+                return task
+        key_in = schemas.IdempotencyKeyCreate(key=key, fingerprint=request_fingerprint)
+        try:
+            try:
+                task = await repo.enqueue_task(
+                    name, car_id, action, payload, session, key_in
+                )
+            except repo.RepoIdempotencyKeyExistsError:
+                task = await self._replay_stored(key, request_fingerprint, session)
+                if task is not None:
+                    if admission is not None:
+                        admission.release()
+                    return task
+                # The key expired, but was not cleaned up yet, or its task
+                # was deleted. Either way it has nothing to replay.
+                await repo.delete_idempotency_keys(session, None, key)
+                task = await repo.enqueue_task(
+                    name, car_id, action, payload, session, key_in
+                )
+        except BaseException:
+            if admission is not None:
+                admission.release()
+            raise
+        self._remember(key, _Entry(request_fingerprint, task.id, task.created_at))
+        return task
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import actions, models, repo, schemas, settings
+from app.events import TaskEventHub
+from app.garage import GarageClient
+from app.journal import MessageJournal
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class JobQueue:
+    """
+    Bounded pool of worker coroutines that claim jobs from the `jobs` table.
+
+    Jobs are leased, not popped: a worker that dies stops renewing its lease
+    and the job is picked up again once the lease expires.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        journal: MessageJournal,
+        garage_client: GarageClient | None = None,
+        concurrency: int = settings.JOB_WORKERS,
+        lease_seconds: float = settings.JOB_LEASE_SECONDS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        events: TaskEventHub | None = None,
+    ):
+        self.session_maker = session_maker
+        self.journal = journal
+        self.garage_client = garage_client or GarageClient()
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.events = events
+        self.worker_id = uuid.uuid4().hex
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._busy: set[asyncio.Task] = set()
+        self._stopping = False
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def resume(self) -> None:
+        """
+        Picks up workflows interrupted by a restart. Running jobs whose lease
+        was not renewed for two heartbeats are queued again and resume from
+        their last checkpoint. Tasks in progress without any job left are
+        marked failed, since nothing would ever finish them.
+        """
+        async with self.session_maker() as session:
+            requeued = await repo.requeue_stale_jobs(
+                self.lease_seconds * 2 / 3, session
+            )
+            orphaned = await repo.read_orphaned_tasks(session)
+        if requeued:
+            logger.info("requeued %s interrupted jobs", requeued)
+        for task in orphaned:
+            logger.warning("task %s has no job left, marking it failed", task.id)
+            await self.journal.append(f"Interrupted {task.name}", task.id)
+            async with self.session_maker() as session:
+                data = {"status": schemas.TaskStatuses.failed}
+                self._publish_status(await repo.update_task(task.id, data, session))
+        self.notify()
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"job-worker-{n}")
+            for n in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Idle workers finish their loop, only workers running a job are
+        cancelled and queue the job again. A cancellation that lands in
+        a connection checkout or reset can leak the pooled connection.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        for worker in self._busy:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def wait_idle(self) -> None:
+        while True:
+            async with self.session_maker() as session:
+                if not await repo.count_pending_jobs(session):
+                    return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                async with self.session_maker() as session:
+                    job = await repo.claim_job(
+                        self.worker_id, self.lease_seconds, session
+                    )
+            except Exception as err:
+                logger.error("claim failed: %s, type(err): %s", err, type(err))
+                job = None
+            if job is None:
+                await self._wait_for_work()
+                continue
+            if self._stopping:
+                await self._finish(job, schemas.JobStatuses.queued)
+                return
+            await self._run(job)
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self, job: models.Job) -> None:
+        worker = asyncio.current_task()
+        self._busy.add(worker)
+        try:
+            await self._run_job(job)
+        finally:
+            self._busy.discard(worker)
+
+    async def _run_job(self, job: models.Job) -> None:
+        workflow = asyncio.create_task(
+            actions.run_job(job, self.garage_client, self.session_maker, self.journal)
+        )
+        lease = asyncio.create_task(self._keep_lease(job.id, workflow))
+        try:
+            task = await workflow
+            status = schemas.JobStatuses.done
+            self._publish_status(task)
+        except asyncio.CancelledError:
+            if lease.done() and not lease.cancelled():
+                # The lease was lost, the job belongs to whoever claims it next.
+                logger.warning("job %s lost its lease and was cancelled", job.id)
+                return
+            lease.cancel()
+            await self._finish(job, schemas.JobStatuses.queued)
+            raise
+        except Exception as err:
+            logger.error("job %s failed: %s, type(err): %s", job.id, err, type(err))
+            if job.attempts < self.max_attempts:
+                status = schemas.JobStatuses.queued
+            else:
+                status = schemas.JobStatuses.failed
+        lease.cancel()
+        await self._finish(job, status)
+
+    async def _finish(self, job: models.Job, status: str) -> None:
+        async with self.session_maker() as session:
+            if status == schemas.JobStatuses.failed:
+                data = {"status": schemas.TaskStatuses.failed}
+                task = await repo.update_task(job.task_id, data, session)
+                self._publish_status(task)
+            await repo.finish_job(job.id, status, session)
+
+    def _publish_status(self, task: models.Task) -> None:
+        if self.events is not None:
+            self.events.publish_status(task)
+
+    async def _keep_lease(self, job_id: int, workflow: asyncio.Task) -> None:
+        """
+        Renews the lease of a running job and cancels its workflow once the
+        lease is lost: another worker took the job over, or no renewal
+        succeeded and the lease would expire before the next attempt.
+        """
+        interval = self.lease_seconds / 3
+        lease_until = time.monotonic() + self.lease_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # The heartbeat is cancelled when the job ends, the shield
+                # lets a renewal in progress return its connection first.
+                renewed = await asyncio.shield(self._extend_lease(job_id))
+            except Exception as err:
+                logger.error(
+                    "lease of job %s was not renewed: %s, type(err): %s",
+                    job_id,
+                    err,
+                    type(err),
+                )
+                renewed = None
+            if renewed:
+                lease_until = time.monotonic() + self.lease_seconds
+                continue
+            if renewed is False or time.monotonic() + interval >= lease_until:
+                workflow.cancel()
+                return
+
+    async def _extend_lease(self, job_id: int) -> bool:
+        async with self.session_maker() as session:
+            return await repo.extend_job_lease(
+                job_id, self.worker_id, self.lease_seconds, session
+            )
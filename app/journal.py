@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import repo, schemas, settings
+from app.events import TaskEventHub
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass
+class JournalStats:
+    flushes: int = 0
+    messages: int = 0
+    errors: int = 0
+    batch_size_max: int = 0
+    flush_seconds_total: float = 0.0
+    flush_seconds_max: float = 0.0
+
+
+class MessageJournal:
+    """
+    Write-behind journal for task messages.
+
+    A single writer coroutine collects messages from all running workflows
+    and commits them in one transaction every `flush_interval` seconds
+    or every `max_batch_size` messages, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        flush_interval: float = settings.JOURNAL_FLUSH_INTERVAL,
+        max_batch_size: int = settings.JOURNAL_MAX_BATCH_SIZE,
+        events: TaskEventHub | None = None,
+    ):
+        self.session_maker = session_maker
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.events = events
+        self.stats = JournalStats()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer: asyncio.Task | None = None
+
+    def append(
+        self,
+        body: str,
+        task_id: int,
+        *,
+        step_name: str | None = None,
+        duration_ms: float | None = None,
+        attempt: int | None = None,
+        outcome: schemas.StepOutcomes | None = None,
+    ) -> asyncio.Future:
+        """
+        Returns a future that resolves once the message is committed.
+        """
+        ack = asyncio.get_running_loop().create_future()
+        msg_in = schemas.MessageCreate(
+            body=body,
+            task_id=task_id,
+            step_name=step_name,
+            duration_ms=duration_ms,
+            attempt=attempt,
+            outcome=outcome,
+        )
+        self._queue.put_nowait((msg_in, ack))
+        return ack
+
+    async def start(self) -> None:
+        self._writer = asyncio.create_task(self._write(), name="message-journal")
+
+    async def stop(self) -> None:
+        self._queue.put_nowait(None)
+        await self._writer
+        self._writer = None
+
+    async def _write(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = await asyncio.wait_for(
+                        self._queue.get(), max(deadline - loop.time(), 0)
+                    )
+                except TimeoutError:
+                    break
+                if item is None:
+                    await self._flush(batch)
+                    return
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[schemas.MessageCreate, asyncio.Future]]):
+        start = time.perf_counter()
+        try:
+            async with self.session_maker() as session:
+                messages = await repo.create_messages(
+                    [msg_in for msg_in, _ack in batch], session
+                )
+        except Exception as err:
+            logger.error("journal flush failed: %s, type(err): %s", err, type(err))
+            self.stats.errors += 1
+            for _msg_in, ack in batch:
+                if not ack.done():
+                    ack.set_exception(err)
+                    # The failure is logged above, appends nobody awaits
+                    # must not log it again when their ack is collected.
+                    ack.exception()
+            return
+        duration = time.perf_counter() - start
+        self.stats.flushes += 1
+        self.stats.messages += len(batch)
+        self.stats.batch_size_max = max(self.stats.batch_size_max, len(batch))
+        self.stats.flush_seconds_total += duration
+        self.stats.flush_seconds_max = max(self.stats.flush_seconds_max, duration)
+        if self.events is not None:
+            for message in messages:
+                self.events.publish_message(message)
+        for _msg_in, ack in batch:
+            if not ack.done():
+                ack.set_result(None)
@@ -1,18 +1,62 @@
 import logging
+from dataclasses import asdict
 from datetime import datetime
 from typing import Annotated
 
 import uvicorn
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, status
+from fastapi import APIRouter, FastAPI, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from sqlalchemy import select
 
-from app import actions, dependencies, helpers, models, repo, schemas
+from app import (
+    actions,
+    db,
+    dependencies,
+    events,
+    helpers,
+    metrics,
+    models,
+    profiling,
+    repo,
+    schemas,
+    settings,
+)
+from app.admission import AdmissionRejectedError
+from app.idempotency import IdempotencyKeyReusedError
 
 logger = logging.getLogger("uvicorn.error")
 
 
 app = FastAPI(lifespan=helpers.lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
 app_launch_time = datetime.now()
+# Profiles show the internals of the service, so the routes only exist
+# while profiles can be captured.
+debug_router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def _decode_cursor(cursor: str | None) -> int | None:
+    if cursor is None:
+        return None
+    try:
+        return helpers.decode_cursor(cursor)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+
+def _next_cursor(items: list, limit: int) -> str | None:
+    if len(items) < limit or not items:
+        return None
+    return helpers.encode_cursor(items[-1].id)
+
+
+def _admission_rejected(err: AdmissionRejectedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(err),
+        headers={"Retry-After": str(err.retry_after)},
+    )
 
 
 @app.get("/", tags=["common"])
@@ -25,11 +69,93 @@ async def root() -> dict:
     }
 
 
+@app.get("/metrics", tags=["common"], response_class=PlainTextResponse)
+async def read_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@debug_router.get("/profiles")
+async def read_profiles() -> dict:
+    return {
+        "enabled": profiling.PROFILER.enabled,
+        "threshold_seconds": profiling.PROFILER.threshold,
+        "skipped": profiling.PROFILER.skipped,
+        "profiles": [profile.summary() for profile in profiling.PROFILER.profiles],
+    }
+
+
+@debug_router.get("/profiles/{profile_id}")
+async def read_profile(
+    profile_id: int,
+    output_format: Annotated[
+        schemas.ProfileFormats, Query(alias="format")
+    ] = schemas.ProfileFormats.pstats,
+) -> Response:
+    profile = profiling.PROFILER.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"There is no profile with id={profile_id}",
+        )
+    if output_format == schemas.ProfileFormats.text:
+        return PlainTextResponse(profile.text())
+    return Response(
+        profile.dump(),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'
+        },
+    )
+
+
+if settings.PROFILING_ENABLED or settings.PROFILING_HEADER_ENABLED:
+    app.include_router(debug_router)
+
+
+@app.get("/db/pool", tags=["common"])
+async def read_pool_stats(
+    engine: dependencies.EngineDepends, read_engine: dependencies.ReadEngineDepends
+) -> dict:
+    return {
+        "writer": db.get_pool_stats(engine),
+        "readers": db.get_pool_stats(read_engine),
+    }
+
+
 @app.get("/cars", tags=["cars"], response_model=schemas.CarList)
 async def get_cars(garage_client: dependencies.GarageClientDepends) -> schemas.CarList:
     return await garage_client.get_car_list()
 
 
+@app.get("/cars/cache", tags=["cars"])
+async def read_cars_cache_stats(
+    garage_client: dependencies.GarageClientDepends,
+) -> dict:
+    return asdict(garage_client.stats)
+
+
+@app.get("/cars/admission", tags=["cars"])
+async def read_admission_stats(admission: dependencies.AdmissionDepends) -> dict:
+    return {"max_pending": admission.max_pending, **asdict(admission.stats)}
+
+
+@app.get("/cars/idempotency", tags=["cars"])
+async def read_idempotency_stats(
+    idempotency_keys: dependencies.IdempotencyKeysDepends,
+) -> dict:
+    return asdict(idempotency_keys.stats)
+
+
+@app.get("/cars/breaker", tags=["cars"])
+async def read_garage_breaker(garage_guard: dependencies.GarageGuardDepends) -> dict:
+    return garage_guard.snapshot()
+
+
+@app.get("/cars/queues", tags=["cars"])
+async def read_cars_queues(session: dependencies.SessionDepends) -> dict:
+    return await repo.count_pending_jobs_by_car(session)
+
+
 @app.post(
     "/cars/{car_id}/actions/check",
     tags=["cars"],
@@ -37,19 +163,25 @@ async def get_cars(garage_client: dependencies.GarageClientDepends) -> schemas.C
 )
 async def check_car(
     car_id: str,
-    garage_client: dependencies.GarageClientDepends,
-    background_tasks: BackgroundTasks,
+    job_queue: dependencies.JobQueueDepends,
     session: dependencies.SessionDepends,
+    idempotency_keys: dependencies.IdempotencyKeysDepends,
+    admission: dependencies.AdmissionDepends,
+    idempotency_key: dependencies.IdempotencyKeyHeader = None,
 ) -> models.Task:
     try:
         task = await actions.check_car(
-            car_id,
-            garage_client,
-            background_tasks,
-            session,
+            car_id, session, idempotency_keys, idempotency_key, admission
         )
     except actions.ActionsCarsError as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except AdmissionRejectedError as err:
+        raise _admission_rejected(err)
+    except IdempotencyKeyReusedError as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
+        )
+    job_queue.notify()
     return task
 
 
@@ -61,20 +193,25 @@ async def check_car(
 async def send_for_repair_car(
     car_id: str,
     problem: str,
-    garage_client: dependencies.GarageClientDepends,
-    background_tasks: BackgroundTasks,
+    job_queue: dependencies.JobQueueDepends,
     session: dependencies.SessionDepends,
+    idempotency_keys: dependencies.IdempotencyKeysDepends,
+    admission: dependencies.AdmissionDepends,
+    idempotency_key: dependencies.IdempotencyKeyHeader = None,
 ) -> models.Task:
     try:
         task = await actions.send_for_repair(
-            car_id,
-            problem,
-            garage_client,
-            background_tasks,
-            session,
+            car_id, problem, session, idempotency_keys, idempotency_key, admission
         )
     except actions.ActionsCarsError as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except AdmissionRejectedError as err:
+        raise _admission_rejected(err)
+    except IdempotencyKeyReusedError as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
+        )
+    job_queue.notify()
     return task
 
 
@@ -85,31 +222,76 @@ async def send_for_repair_car(
 )
 async def send_to_parking(
     car_id: str,
-    garage_client: dependencies.GarageClientDepends,
-    background_tasks: BackgroundTasks,
+    job_queue: dependencies.JobQueueDepends,
     session: dependencies.SessionDepends,
+    idempotency_keys: dependencies.IdempotencyKeysDepends,
+    admission: dependencies.AdmissionDepends,
+    idempotency_key: dependencies.IdempotencyKeyHeader = None,
 ) -> models.Task:
     try:
         task = await actions.send_to_parking(
-            car_id,
-            garage_client,
-            background_tasks,
-            session,
+            car_id, session, idempotency_keys, idempotency_key, admission
         )
     except actions.ActionsCarsError as err:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    except AdmissionRejectedError as err:
+        raise _admission_rejected(err)
+    except IdempotencyKeyReusedError as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
+        )
+    job_queue.notify()
     return task
 
 
-@app.get("/tasks", tags=["tasks"], response_model=schemas.TaskList)
+@app.post(
+    "/cars/actions/{action}",
+    tags=["cars"],
+    response_model=schemas.BulkCarActionResult,
+)
+async def run_bulk_car_action(
+    action: schemas.CarActions,
+    bulk_action: schemas.BulkCarAction,
+    job_queue: dependencies.JobQueueDepends,
+    session: dependencies.SessionDepends,
+    admission: dependencies.AdmissionDepends,
+) -> schemas.BulkCarActionResult:
+    try:
+        task_ids = await actions.run_bulk_action(
+            action, bulk_action.car_ids, bulk_action.problem, session, admission
+        )
+    except actions.ActionsCarsError as err:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err)
+        )
+    except AdmissionRejectedError as err:
+        raise _admission_rejected(err)
+    job_queue.notify()
+    return schemas.BulkCarActionResult(task_ids=task_ids)
+
+
+@app.get(
+    "/tasks",
+    tags=["tasks"],
+    response_model=schemas.TaskList | schemas.TaskSummaryList,
+)
 async def read_tasks(
     session: dependencies.SessionDepends,
     offset: int = 0,
     limit: Annotated[int, Query(le=100)] = 100,
-) -> schemas.TaskList:
-    tasks = await repo.read_tasks(session, offset, limit)
+    cursor: str | None = None,
+    view: schemas.TaskViews = schemas.TaskViews.full,
+) -> schemas.TaskList | schemas.TaskSummaryList:
+    before_id = _decode_cursor(cursor)
+    if view == schemas.TaskViews.summary:
+        rows = await repo.read_task_summaries(session, offset, limit, before_id)
+        tasks = [schemas.TaskSummary.model_validate(row) for row in rows]
+        return schemas.TaskSummaryList(
+            tasks=tasks, next_cursor=_next_cursor(tasks, limit)
+        )
+    tasks = await repo.read_tasks(session, offset, limit, before_id)
     tasks = [schemas.Task.model_validate(task) for task in tasks]
-    return schemas.TaskList(tasks=tasks)
+    return schemas.TaskList(tasks=tasks, next_cursor=_next_cursor(tasks, limit))
 
 
 @app.get("/tasks/{task_id}", tags=["tasks"], response_model=schemas.Task)
@@ -122,22 +304,65 @@ async def read_task(task_id: int, session: dependencies.SessionDepends) -> schem
     return schemas.Task.model_validate(task)
 
 
+@app.get("/tasks/{task_id}/events", tags=["tasks"])
+async def read_task_events(
+    task_id: int,
+    session_maker: dependencies.SessionMakerDepends,
+    event_hub: dependencies.EventsDepends,
+) -> StreamingResponse:
+    if not settings.JOB_RUN_IN_API:
+        # Workflows run in `app.worker` processes, their events never
+        # reach the hub of this process.
+        async with session_maker() as session:
+            task = await session.get(models.Task, task_id)
+        if not task:
+            raise HTTPException(
+                status_code=404, detail=f"Task with id={task_id} not found"
+            )
+        return StreamingResponse(
+            events.poll_task_events(task, session_maker),
+            media_type="text/event-stream",
+        )
+    subscription = event_hub.subscribe(task_id)
+    async with session_maker() as session:
+        task = await session.get(models.Task, task_id)
+    if not task:
+        subscription.close()
+        raise HTTPException(status_code=404, detail=f"Task with id={task_id} not found")
+    return StreamingResponse(
+        events.stream_task_events(task, subscription),
+        media_type="text/event-stream",
+    )
+
+
 @app.get("/messages", tags=["messages"], response_model=schemas.MessageList)
 async def read_messages(
     session: dependencies.SessionDepends,
     offset: int = 0,
     limit: Annotated[int, Query(le=100)] = 100,
+    cursor: str | None = None,
 ) -> schemas.MessageList:
-    stmt = (
-        select(models.Message)
-        .order_by(models.Message.id.desc())
-        .offset(offset)
-        .limit(limit)
+    before_id = _decode_cursor(cursor)
+    messages = await repo.read_messages(session, offset, limit, before_id)
+    messages = [schemas.Message.model_validate(msg) for msg in messages]
+    return schemas.MessageList(
+        messages=messages, next_cursor=_next_cursor(messages, limit)
     )
-    result = await session.execute(stmt)
-    messages = result.scalars().all()
-    messages = [schemas.Message.model_validate(task) for task in messages]
-    return schemas.MessageList(messages=messages)
+
+
+@app.get("/messages/steps", tags=["messages"], response_model=schemas.StepLatencyList)
+async def read_step_latencies(
+    session: dependencies.SessionDepends, since: datetime | None = None
+) -> schemas.StepLatencyList:
+    steps = await repo.read_step_latencies(session, since)
+    return schemas.StepLatencyList(
+        steps=[schemas.StepLatency.model_validate(step) for step in steps]
+    )
+
+
+@app.get("/messages/journal", tags=["messages"])
+async def read_journal_stats(journal: dependencies.JournalDepends) -> dict:
+    return asdict(journal.stats)
 
 
 if __name__ == "__main__":
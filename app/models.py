@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import ForeignKey, String, func
+from sqlalchemy import JSON, ForeignKey, String, UniqueConstraint, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -34,5 +35,58 @@ class Message(Base):
     created_at: Mapped[datetime] = mapped_column(
         nullable=False, insert_default=func.now()
     )
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"))
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), index=True)
+    step_name: Mapped[str | None] = mapped_column(String(50), index=True)
+    duration_ms: Mapped[float | None]
+    attempt: Mapped[int | None]
+    outcome: Mapped[str | None] = mapped_column(String(30))
     task: Mapped["Task"] = relationship(back_populates="messages")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), index=True)
+    action: Mapped[str] = mapped_column(String(30), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(30), nullable=False, index=True)
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    locked_by: Mapped[str | None] = mapped_column(String(32))
+    lease_until: Mapped[datetime | None]
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, insert_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, insert_default=func.now(), server_onupdate=func.now()
+    )
+
+
+class Checkpoint(Base):
+    __tablename__ = "checkpoints"
+    __table_args__ = (UniqueConstraint("task_id", "step_name"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), index=True)
+    step_index: Mapped[int] = mapped_column(nullable=False)
+    step_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    result: Mapped[Any] = mapped_column(JSON, nullable=True)
+    message: Mapped[str] = mapped_column(String, nullable=False)
+    outcome: Mapped[str] = mapped_column(
+        String(30), nullable=False, server_default="succeeded"
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, insert_default=func.now()
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"), index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, insert_default=func.now(), index=True
+    )
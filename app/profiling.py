@@ -0,0 +1,181 @@
+import cProfile
+import io
+import itertools
+import logging
+import marshal
+import pstats
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass
+class Profile:
+    id: int
+    kind: str
+    name: str
+    duration_seconds: float
+    created_at: datetime
+    stats: dict = field(repr=False)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "name": self.name,
+            "duration_seconds": self.duration_seconds,
+            "created_at": self.created_at,
+        }
+
+    def dump(self) -> bytes:
+        """
+        The profile in the `pstats` file format, readable by `pstats`
+        and tools like snakeviz.
+        """
+        return marshal.dumps(self.stats)
+
+    def text(self, limit: int = 50) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(_StatsSnapshot(self.stats), stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return stream.getvalue()
+
+
+class _StatsSnapshot:
+    """
+    `pstats.Stats` takes the stats of a profiler-like object and empties
+    it, so it gets a copy of the captured stats instead of the profiler.
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = dict(stats)
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Profiler:
+    """
+    Captures `cProfile` profiles of requests and workflows that took at
+    least `threshold` seconds and keeps the last `buffer_size` of them.
+
+    The profiler hooks the whole thread, so with asyncio a profile also
+    shows everything else the event loop ran meanwhile, and only one
+    profile is captured at a time: overlapping runs are skipped.
+    When disabled, `profile()` costs one attribute check.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.PROFILING_ENABLED,
+        threshold: float = settings.PROFILING_THRESHOLD_SECONDS,
+        buffer_size: int = settings.PROFILING_BUFFER_SIZE,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.profiles: deque[Profile] = deque(maxlen=buffer_size)
+        self.skipped = 0
+        self._active: cProfile.Profile | None = None
+        self._ids = itertools.count(1)
+
+    def get(self, profile_id: int) -> Profile | None:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    @asynccontextmanager
+    async def profile(
+        self,
+        kind: str,
+        name: str,
+        force: bool = False,
+        threshold: float | None = None,
+    ) -> AsyncIterator[None]:
+        if not (self.enabled or force):
+            yield
+            return
+        if self._active is not None:
+            self.skipped += 1
+            yield
+            return
+        profiler = cProfile.Profile()
+        self._active = profiler
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._active = None
+            duration = time.perf_counter() - start
+            if duration >= (self.threshold if threshold is None else threshold):
+                profiler.create_stats()
+                self.profiles.append(
+                    Profile(
+                        id=next(self._ids),
+                        kind=kind,
+                        name=name,
+                        duration_seconds=duration,
+                        created_at=datetime.now(),
+                        stats=profiler.stats,
+                    )
+                )
+                logger.info("captured profile of %s %s: %.3fs", kind, name, duration)
+
+
+PROFILER = Profiler()
+
+
+def _header_threshold(value: str) -> float | None:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests while profiling is enabled, or, if `header_enabled`,
+    when the request has the `PROFILING_HEADER` header. The header value
+    may set the threshold in seconds for that request, e.g. `X-Profile: 0`
+    keeps every profile. Any client can send the header, so it is off
+    by default.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: Profiler = PROFILER,
+        header_enabled: bool = settings.PROFILING_HEADER_ENABLED,
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.header_enabled = header_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = None
+        if self.header_enabled:
+            header = Headers(scope=scope).get(settings.PROFILING_HEADER)
+        if header is None and not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        threshold = None if header is None else _header_threshold(header)
+        name = f"{scope['method']} {scope['path']}"
+        async with self.profiler.profile(
+            "request", name, force=header is not None, threshold=threshold
+        ):
+            await self.app(scope, receive, send)
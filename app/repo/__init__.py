@@ -1,2 +1,33 @@
-from ._messages import create_message
-from ._tasks import RepoTasksError, create_task, read_tasks, update_task
+from ._checkpoints import create_checkpoints, read_checkpoints
+from ._idempotency import delete_idempotency_keys, read_idempotency_key
+from ._jobs import (
+    RepoIdempotencyKeyExistsError,
+    claim_job,
+    count_pending_jobs,
+    count_pending_jobs_by_car,
+    enqueue_task,
+    enqueue_tasks,
+    extend_job_lease,
+    finish_job,
+    read_orphaned_tasks,
+    requeue_stale_jobs,
+)
+from ._messages import (
+    create_message,
+    create_messages,
+    read_messages,
+    read_reported_steps,
+    read_step_latencies,
+    read_task_messages,
+)
+from ._tasks import (
+    RepoTasksError,
+    create_task,
+    delete_tasks,
+    read_expired_task_ids,
+    read_task_status,
+    read_task_summaries,
+    read_tasks,
+    read_tasks_by_ids,
+    update_task,
+)
@@ -0,0 +1,28 @@
+from typing import Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+
+from ._commit import commit
+
+
+async def create_checkpoints(
+    checkpoints: list[schemas.CheckpointCreate], session: AsyncSession
+) -> None:
+    data = [checkpoint_in.model_dump() for checkpoint_in in checkpoints]
+    await session.execute(insert(models.Checkpoint), data)
+    await commit(session)
+
+
+async def read_checkpoints(
+    task_id: int, session: AsyncSession
+) -> Sequence[models.Checkpoint]:
+    stmt = (
+        select(models.Checkpoint)
+        .where(models.Checkpoint.task_id == task_id)
+        .order_by(models.Checkpoint.step_index)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
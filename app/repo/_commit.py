@@ -0,0 +1,8 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import db, metrics
+
+
+async def commit(session: AsyncSession) -> None:
+    with metrics.DB_COMMIT_SECONDS.time():
+        await db.run_to_completion(session.commit())
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+from ._commit import commit
+
+
+async def read_idempotency_key(
+    key: str, session: AsyncSession
+) -> models.IdempotencyKey | None:
+    stmt = select(models.IdempotencyKey).where(models.IdempotencyKey.key == key)
+    result = await session.execute(stmt)
+    return result.scalars().first()
+
+
+async def delete_idempotency_keys(
+    session: AsyncSession, created_before: datetime | None, key: str | None = None
+) -> int:
+    """
+    Deletes keys created before `created_before`, or of any age if it is
+    None, only `key` if given.
+    """
+    stmt = delete(models.IdempotencyKey)
+    if created_before is not None:
+        stmt = stmt.where(models.IdempotencyKey.created_at < created_before)
+    if key is not None:
+        stmt = stmt.where(models.IdempotencyKey.key == key)
+    result = await session.execute(stmt)
+    await commit(session)
+    return result.rowcount
@@ -0,0 +1,246 @@
+from datetime import UTC, datetime, timedelta
+from typing import Sequence
+
+from sqlalchemy import and_, exists, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import models, schemas
+
+from ._commit import commit
+
+
+class RepoIdempotencyKeyExistsError(Exception):
+    pass
+
+
+def _utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+async def enqueue_task(
+    name: str,
+    car_id: str,
+    action: str,
+    payload: dict,
+    session: AsyncSession,
+    idempotency_key: schemas.IdempotencyKeyCreate | None = None,
+) -> models.Task:
+    """
+    Creates a task and the job that will run it in one transaction,
+    so a task never exists without the work that completes it.
+    With `idempotency_key` the key is stored in the same transaction,
+    and nothing is created if the key already exists.
+    """
+    task_in = schemas.TaskCreate(
+        name=name,
+        car_id=car_id,
+        status=schemas.TaskStatuses.in_progress,
+    )
+    task = models.Task(**task_in.model_dump())
+    session.add(task)
+    await session.flush()
+    job = models.Job(
+        task_id=task.id,
+        action=action,
+        payload=payload,
+        status=schemas.JobStatuses.queued,
+    )
+    session.add(job)
+    if idempotency_key is not None:
+        session.add(
+            models.IdempotencyKey(task_id=task.id, **idempotency_key.model_dump())
+        )
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            raise RepoIdempotencyKeyExistsError(
+                f"Idempotency key {repr(idempotency_key.key)} already exists"
+            )
+    await commit(session)
+    await session.refresh(task)
+    return task
+
+
+async def enqueue_tasks(
+    action: str, items: list[tuple[str, str, dict]], session: AsyncSession
+) -> list[int]:
+    """
+    Bulk version of `enqueue_task`: `items` are (name, car_id, payload)
+    tuples, tasks and jobs are written with one multi-row insert each.
+    """
+    tasks_data = [
+        schemas.TaskCreate(name=name, car_id=car_id).model_dump()
+        for name, car_id, _payload in items
+    ]
+    stmt = insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True)
+    result = await session.execute(stmt, tasks_data)
+    task_ids = list(result.scalars().all())
+    jobs_data = [
+        {
+            "task_id": task_id,
+            "action": action,
+            "payload": payload,
+            "status": schemas.JobStatuses.queued,
+        }
+        for task_id, (_name, _car_id, payload) in zip(task_ids, items)
+    ]
+    await session.execute(insert(models.Job), jobs_data)
+    await commit(session)
+    return task_ids
+
+
+async def claim_job(
+    worker_id: str, lease_seconds: float, session: AsyncSession
+) -> models.Job | None:
+    """
+    Atomically takes the oldest queued job, or a running job whose lease
+    has expired, and leases it to the worker.
+
+    Jobs of a car that already has a job with a live lease are skipped,
+    so workflows of one car run one after another in creation order
+    while different cars run in parallel.
+    """
+    now = _utcnow()
+    busy_job = aliased(models.Job)
+    busy_task = aliased(models.Task)
+    busy_car_ids = (
+        select(busy_task.car_id)
+        .join(busy_job, busy_job.task_id == busy_task.id)
+        .where(
+            busy_job.status == schemas.JobStatuses.running,
+            busy_job.lease_until >= now,
+        )
+    )
+    next_job_id = (
+        select(models.Job.id)
+        .join(models.Task, models.Job.task_id == models.Task.id)
+        .where(
+            or_(
+                models.Job.status == schemas.JobStatuses.queued,
+                and_(
+                    models.Job.status == schemas.JobStatuses.running,
+                    models.Job.lease_until < now,
+                ),
+            ),
+            models.Task.car_id.not_in(busy_car_ids),
+        )
+        .order_by(models.Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(models.Job)
+        .where(models.Job.id == next_job_id)
+        .values(
+            status=schemas.JobStatuses.running,
+            locked_by=worker_id,
+            lease_until=now + timedelta(seconds=lease_seconds),
+            attempts=models.Job.attempts + 1,
+            updated_at=now,
+        )
+        .returning(models.Job)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    job = result.scalars().first()
+    await commit(session)
+    return job
+
+
+async def extend_job_lease(
+    job_id: int, worker_id: str, lease_seconds: float, session: AsyncSession
+) -> bool:
+    now = _utcnow()
+    stmt = (
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.locked_by == worker_id)
+        .values(lease_until=now + timedelta(seconds=lease_seconds), updated_at=now)
+    )
+    result = await session.execute(stmt)
+    await commit(session)
+    return result.rowcount == 1
+
+
+async def finish_job(job_id: int, status: str, session: AsyncSession) -> None:
+    stmt = (
+        update(models.Job)
+        .where(models.Job.id == job_id)
+        .values(status=status, locked_by=None, lease_until=None, updated_at=_utcnow())
+    )
+    await session.execute(stmt)
+    await commit(session)
+
+
+async def requeue_stale_jobs(stale_seconds: float, session: AsyncSession) -> int:
+    """
+    Returns running jobs whose lease was not renewed for `stale_seconds`
+    to the queue, so they are picked up without waiting for the lease.
+    """
+    now = _utcnow()
+    stmt = (
+        update(models.Job)
+        .where(
+            models.Job.status == schemas.JobStatuses.running,
+            models.Job.updated_at < now - timedelta(seconds=stale_seconds),
+        )
+        .values(
+            status=schemas.JobStatuses.queued,
+            locked_by=None,
+            lease_until=None,
+            updated_at=now,
+        )
+    )
+    result = await session.execute(stmt)
+    await commit(session)
+    return result.rowcount
+
+
+async def read_orphaned_tasks(session: AsyncSession) -> Sequence[models.Task]:
+    """
+    Tasks in progress without a queued or running job: nothing will ever
+    finish them.
+    """
+    pending_job = exists().where(
+        models.Job.task_id == models.Task.id,
+        models.Job.status.in_(
+            [schemas.JobStatuses.queued, schemas.JobStatuses.running]
+        ),
+    )
+    stmt = (
+        select(models.Task)
+        .where(models.Task.status == schemas.TaskStatuses.in_progress, ~pending_job)
+        .order_by(models.Task.id)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def count_pending_jobs(session: AsyncSession) -> int:
+    stmt = select(func.count(models.Job.id)).where(
+        models.Job.status.in_([schemas.JobStatuses.queued, schemas.JobStatuses.running])
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def count_pending_jobs_by_car(session: AsyncSession) -> dict[str, dict]:
+    stmt = (
+        select(models.Task.car_id, models.Job.status, func.count(models.Job.id))
+        .join(models.Task, models.Job.task_id == models.Task.id)
+        .where(
+            models.Job.status.in_(
+                [schemas.JobStatuses.queued, schemas.JobStatuses.running]
+            )
+        )
+        .group_by(models.Task.car_id, models.Job.status)
+        .order_by(models.Task.car_id)
+    )
+    result = await session.execute(stmt)
+    depths: dict[str, dict] = {}
+    for car_id, status, count in result.all():
+        depth = depths.setdefault(car_id, {"queued": 0, "running": 0})
+        depth[status] = count
+    return depths
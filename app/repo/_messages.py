@@ -1,7 +1,13 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import Row, case, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 
+from ._commit import commit
+
 
 async def create_message(
     body: str, task_id: int, session: AsyncSession
@@ -10,6 +16,115 @@ async def create_message(
     data = msg_in.model_dump()
     message = models.Message(**data)
     session.add(message)
-    await session.commit()
+    await commit(session)
     await session.refresh(message)
     return message
+
+
+async def create_messages(
+    messages: list[schemas.MessageCreate], session: AsyncSession
+) -> Sequence[models.Message]:
+    data = [msg_in.model_dump() for msg_in in messages]
+    stmt = insert(models.Message).returning(
+        models.Message, sort_by_parameter_order=True
+    )
+    result = await session.execute(stmt, data)
+    created = result.scalars().all()
+    await commit(session)
+    return created
+
+
+async def read_messages(
+    session: AsyncSession,
+    offset: int | None = None,
+    limit: int | None = None,
+    before_id: int | None = None,
+) -> Sequence[models.Message]:
+    stmt = select(models.Message).order_by(models.Message.id.desc())
+    if before_id is not None:
+        stmt = stmt.where(models.Message.id < before_id)
+    if offset is not None:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def read_task_messages(
+    task_id: int, after_id: int, session: AsyncSession
+) -> Sequence[models.Message]:
+    stmt = (
+        select(models.Message)
+        .where(models.Message.task_id == task_id, models.Message.id > after_id)
+        .order_by(models.Message.id)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def read_reported_steps(task_id: int, session: AsyncSession) -> set[str]:
+    """
+    Names of the steps whose final message is already stored for the task.
+    """
+    stmt = select(models.Message.step_name).where(
+        models.Message.task_id == task_id,
+        models.Message.outcome.in_(
+            (schemas.StepOutcomes.succeeded, schemas.StepOutcomes.failed)
+        ),
+    )
+    result = await session.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def read_step_latencies(
+    session: AsyncSession, since: datetime | None = None
+) -> Sequence[Row]:
+    """
+    Duration percentiles of finished steps grouped by step name.
+    Percentiles use the nearest-rank method, computed with window functions
+    so only one row per step leaves the database.
+    """
+    finished = (schemas.StepOutcomes.succeeded, schemas.StepOutcomes.failed)
+    ranked = select(
+        models.Message.step_name,
+        models.Message.duration_ms,
+        models.Message.outcome,
+        func.row_number()
+        .over(
+            partition_by=models.Message.step_name,
+            order_by=models.Message.duration_ms,
+        )
+        .label("rank"),
+        func.count().over(partition_by=models.Message.step_name).label("total"),
+    ).where(
+        models.Message.step_name.is_not(None),
+        models.Message.duration_ms.is_not(None),
+        models.Message.outcome.in_(finished),
+    )
+    if since is not None:
+        ranked = ranked.where(models.Message.created_at >= since)
+    ranked = ranked.subquery()
+
+    def percentile(percent: int):
+        in_rank = ranked.c.rank * 100 >= percent * ranked.c.total
+        return func.min(case((in_rank, ranked.c.duration_ms)))
+
+    stmt = (
+        select(
+            ranked.c.step_name,
+            func.count().label("count"),
+            func.count(
+                case((ranked.c.outcome == schemas.StepOutcomes.failed, 1))
+            ).label("failed"),
+            func.avg(ranked.c.duration_ms).label("mean_ms"),
+            percentile(50).label("p50_ms"),
+            percentile(95).label("p95_ms"),
+            percentile(99).label("p99_ms"),
+            func.max(ranked.c.duration_ms).label("max_ms"),
+        )
+        .group_by(ranked.c.step_name)
+        .order_by(ranked.c.step_name)
+    )
+    result = await session.execute(stmt)
+    return result.all()
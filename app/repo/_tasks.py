@@ -1,11 +1,13 @@
 from datetime import UTC, datetime
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, delete, exists, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
 
+from ._commit import commit
+
 
 class RepoTasksError(Exception):
     pass
@@ -20,7 +22,7 @@ async def create_task(name: str, car_id: str, session: AsyncSession) -> models.T
     data = task_in.model_dump()
     task = models.Task(**data)
     session.add(task)
-    await session.commit()
+    await commit(session)
     await session.refresh(task)
     return task
 
@@ -34,18 +36,151 @@ async def update_task(task_id: int, data: dict, session: AsyncSession) -> models
     for field, value in data.items():
         setattr(task, field, value)
     setattr(task, "updated_at", datetime.now(UTC).replace(microsecond=0))
-    await session.commit()
+    await commit(session)
     await session.refresh(task)
     return task
 
 
+async def read_task_status(task_id: int, session: AsyncSession) -> str | None:
+    return await session.scalar(
+        select(models.Task.status).where(models.Task.id == task_id)
+    )
+
+
 async def read_tasks(
-    session: AsyncSession, offset: int | None = None, limit: int | None = None
+    session: AsyncSession,
+    offset: int | None = None,
+    limit: int | None = None,
+    before_id: int | None = None,
 ) -> Sequence[models.Task]:
     stmt = select(models.Task).order_by(models.Task.id.desc())
+    if before_id is not None:
+        stmt = stmt.where(models.Task.id < before_id)
+    if offset is not None:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def read_task_summaries(
+    session: AsyncSession,
+    offset: int | None = None,
+    limit: int | None = None,
+    before_id: int | None = None,
+) -> Sequence[Row]:
+    """
+    Reads task columns with the message count and the last message body
+    instead of loading every message of every task.
+    """
+    message_count = (
+        select(func.count(models.Message.id))
+        .where(models.Message.task_id == models.Task.id)
+        .scalar_subquery()
+    )
+    last_message = (
+        select(models.Message.body)
+        .where(models.Message.task_id == models.Task.id)
+        .order_by(models.Message.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = select(
+        models.Task.id,
+        models.Task.name,
+        models.Task.car_id,
+        models.Task.status,
+        models.Task.created_at,
+        models.Task.updated_at,
+        message_count.label("message_count"),
+        last_message.label("last_message"),
+    ).order_by(models.Task.id.desc())
+    if before_id is not None:
+        stmt = stmt.where(models.Task.id < before_id)
     if offset is not None:
         stmt = stmt.offset(offset)
     if limit is not None:
         stmt = stmt.limit(limit)
     result = await session.execute(stmt)
+    return result.all()
+
+
+_FINISHED_STATUSES = (schemas.TaskStatuses.completed, schemas.TaskStatuses.failed)
+
+
+async def read_expired_task_ids(
+    session: AsyncSession,
+    finished_before: datetime | None = None,
+    keep: int | None = None,
+    limit: int | None = None,
+) -> Sequence[int]:
+    """
+    Ids of finished tasks, oldest first, that were finished before
+    `finished_before` or fall outside the `keep` newest finished tasks.
+    Tasks whose jobs are still queued or running are never expired.
+    """
+    finished = models.Task.status.in_(_FINISHED_STATUSES)
+    expired = []
+    if finished_before is not None:
+        expired.append(models.Task.updated_at < finished_before)
+    if keep is not None:
+        oldest_kept = (
+            select(models.Task.id)
+            .where(finished)
+            .order_by(models.Task.id.desc())
+            .offset(keep)
+            .limit(1)
+            .scalar_subquery()
+        )
+        expired.append(models.Task.id <= oldest_kept)
+    if not expired:
+        return []
+    pending_job = exists().where(
+        models.Job.task_id == models.Task.id,
+        models.Job.status.in_(
+            (schemas.JobStatuses.queued, schemas.JobStatuses.running)
+        ),
+    )
+    stmt = (
+        select(models.Task.id)
+        .where(finished, or_(*expired), ~pending_job)
+        .order_by(models.Task.id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+async def read_tasks_by_ids(
+    task_ids: Sequence[int], session: AsyncSession
+) -> Sequence[models.Task]:
+    stmt = (
+        select(models.Task).where(models.Task.id.in_(task_ids)).order_by(models.Task.id)
+    )
+    result = await session.execute(stmt)
     return result.scalars().all()
+
+
+async def delete_tasks(task_ids: Sequence[int], session: AsyncSession) -> dict:
+    """
+    Deletes the tasks with their messages, jobs, checkpoints and
+    idempotency keys in one transaction and returns how many rows of each
+    were deleted.
+    """
+    deleted = {}
+    for model in (
+        models.Message,
+        models.Job,
+        models.Checkpoint,
+        models.IdempotencyKey,
+    ):
+        result = await session.execute(delete(model).where(model.task_id.in_(task_ids)))
+        deleted[model.__tablename__] = result.rowcount
+    result = await session.execute(
+        delete(models.Task).where(models.Task.id.in_(task_ids))
+    )
+    deleted[models.Task.__tablename__] = result.rowcount
+    await commit(session)
+    return deleted
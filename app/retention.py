@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import gzip
+import logging
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app import db, repo, schemas, settings
+
+logger = logging.getLogger("uvicorn.error")
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class RetentionResult:
+    tasks: int = 0
+    messages: int = 0
+    jobs: int = 0
+    idempotency_keys: int = 0
+    archive: str | None = None
+    vacuumed_pages: int = 0
+
+
+def _append_archive(path: Path, lines: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as archive:
+        for line in lines:
+            archive.write(line + "\n")
+
+
+class Retention:
+    """
+    Archives and deletes finished tasks that are older than `max_age_days`
+    or fall outside the `max_tasks` newest finished tasks.
+
+    Every batch of `batch_size` tasks is first appended with its messages
+    to a gzip-compressed JSONL archive and only then deleted in its own
+    short transaction, so writers wait for one batch at most. Freed pages
+    are returned to the file system with an incremental vacuum.
+
+    Idempotency keys are kept for `idempotency_window` seconds.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        max_age_days: float | None = settings.RETENTION_MAX_AGE_DAYS,
+        max_tasks: int | None = settings.RETENTION_MAX_TASKS,
+        batch_size: int = settings.RETENTION_BATCH_SIZE,
+        archive_dir: Path = settings.RETENTION_ARCHIVE_DIR,
+        interval: float = settings.RETENTION_INTERVAL_SECONDS,
+        vacuum_pages: int = settings.RETENTION_VACUUM_PAGES,
+        idempotency_window: float = settings.IDEMPOTENCY_WINDOW_SECONDS,
+    ):
+        self.session_maker = session_maker
+        self.max_age_days = max_age_days
+        self.max_tasks = max_tasks
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.idempotency_window = idempotency_window
+        self.last_result: RetentionResult | None = None
+        self._scheduler: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._scheduler = asyncio.create_task(self._schedule(), name="retention")
+
+    async def stop(self) -> None:
+        self._scheduler.cancel()
+        await asyncio.gather(self._scheduler, return_exceptions=True)
+        self._scheduler = None
+
+    async def _schedule(self) -> None:
+        # The first pass waits a full interval, a restart loop must not
+        # turn into a burst of deletes.
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as err:
+                logger.error("retention failed: %s, type(err): %s", err, type(err))
+
+    async def run_once(self) -> RetentionResult:
+        result = RetentionResult()
+        async with self.session_maker() as session:
+            result.idempotency_keys = await repo.delete_idempotency_keys(
+                session,
+                datetime.now(UTC).replace(tzinfo=None)
+                - timedelta(seconds=self.idempotency_window),
+            )
+        finished_before = None
+        if self.max_age_days is not None:
+            finished_before = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+                days=self.max_age_days
+            )
+        archive = self.archive_dir / f"tasks-{datetime.now():%Y%m%d-%H%M%S}.jsonl.gz"
+        while True:
+            async with self.session_maker() as session:
+                task_ids = await repo.read_expired_task_ids(
+                    session, finished_before, self.max_tasks, self.batch_size
+                )
+                if not task_ids:
+                    break
+                tasks = await repo.read_tasks_by_ids(task_ids, session)
+                lines = [
+                    schemas.Task.model_validate(task).model_dump_json()
+                    for task in tasks
+                ]
+            await asyncio.to_thread(_append_archive, archive, lines)
+            async with self.session_maker() as session:
+                deleted = await repo.delete_tasks(task_ids, session)
+            result.tasks += deleted["tasks"]
+            result.messages += deleted["messages"]
+            result.jobs += deleted["jobs"]
+            result.idempotency_keys += deleted["idempotency_keys"]
+            result.archive = str(archive)
+        if result.tasks:
+            result.vacuumed_pages = await self._vacuum()
+        self.last_result = result
+        logger.info("retention: %s", result)
+        return result
+
+    async def _vacuum(self) -> int:
+        async with self.session_maker() as session:
+            mode = await session.scalar(text("PRAGMA auto_vacuum"))
+            if mode != _AUTO_VACUUM_INCREMENTAL:
+                logger.info(
+                    "incremental vacuum is off, run `python -m app.retention "
+                    "--enable-incremental-vacuum` once to turn it on"
+                )
+                return 0
+            free_pages = await session.scalar(text("PRAGMA freelist_count"))
+            # The pragma frees one page per step and sqlite3 `execute` only
+            # steps once, so it goes through `executescript` on the driver.
+            conn = await session.connection()
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});"
+            )
+            await db.run_to_completion(session.commit())
+            return free_pages - await session.scalar(text("PRAGMA freelist_count"))
+
+
+async def enable_incremental_vacuum(engine: AsyncEngine) -> None:
+    """
+    Switches the database to incremental auto vacuum. The switch only
+    takes effect after a full VACUUM, which rewrites the whole file.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        await conn.execute(text("VACUUM"))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    engine = db.create_engine()
+    try:
+        if args.enable_incremental_vacuum:
+            await enable_incremental_vacuum(engine)
+        retention = Retention(
+            db.create_session_maker(engine),
+            max_age_days=args.max_age_days,
+            max_tasks=args.max_tasks,
+            batch_size=args.batch_size,
+            archive_dir=args.archive_dir,
+            vacuum_pages=args.vacuum_pages,
+        )
+        result = await retention.run_once()
+    finally:
+        await engine.dispose()
+    print(asdict(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.retention",
+        description="Archive and delete old finished tasks with their messages.",
+    )
+    parser.add_argument(
+        "--max-age-days", type=float, default=settings.RETENTION_MAX_AGE_DAYS
+    )
+    parser.add_argument("--max-tasks", type=int, default=settings.RETENTION_MAX_TASKS)
+    parser.add_argument("--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE)
+    parser.add_argument(
+        "--archive-dir", type=Path, default=settings.RETENTION_ARCHIVE_DIR
+    )
+    parser.add_argument(
+        "--vacuum-pages", type=int, default=settings.RETENTION_VACUUM_PAGES
+    )
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="switch the database to incremental auto vacuum first (runs VACUUM)",
+    )
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,22 @@
-from ._cars import Car, CarList
-from ._messages import Message, MessageCreate, MessageList
-from ._tasks import Task, TaskCreate, TaskList, TaskStatuses
+from ._cars import BulkCarAction, BulkCarActionResult, Car, CarActions, CarList
+from ._checkpoints import CheckpointCreate
+from ._idempotency import IdempotencyKeyCreate
+from ._jobs import JobStatuses
+from ._messages import (
+    Message,
+    MessageCreate,
+    MessageList,
+    StepLatency,
+    StepLatencyList,
+    StepOutcomes,
+)
+from ._profiles import ProfileFormats
+from ._tasks import (
+    Task,
+    TaskCreate,
+    TaskList,
+    TaskStatuses,
+    TaskSummary,
+    TaskSummaryList,
+    TaskViews,
+)
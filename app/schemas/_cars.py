@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+import enum
+
+from pydantic import BaseModel, Field
+
+from app import settings
 
 
 class Car(BaseModel):
@@ -9,3 +13,18 @@ class Car(BaseModel):
 
 class CarList(BaseModel):
     cars: list[Car]
+
+
+class CarActions(enum.StrEnum):
+    check = "check"
+    send_for_repair = "send_for_repair"
+    send_to_parking = "send_to_parking"
+
+
+class BulkCarAction(BaseModel):
+    car_ids: list[str] = Field(min_length=1, max_length=settings.BULK_MAX_CARS)
+    problem: str | None = None
+
+
+class BulkCarActionResult(BaseModel):
+    task_ids: list[int]
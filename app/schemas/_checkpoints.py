@@ -0,0 +1,16 @@
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+from ._messages import StepOutcomes
+
+
+class CheckpointCreate(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    task_id: int
+    step_index: int
+    step_name: str
+    result: Any
+    message: str
+    outcome: StepOutcomes = StepOutcomes.succeeded
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class IdempotencyKeyCreate(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    key: str
+    fingerprint: str
@@ -0,0 +1,8 @@
+import enum
+
+
+class JobStatuses(enum.StrEnum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
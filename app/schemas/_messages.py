@@ -1,13 +1,24 @@
+import enum
 from datetime import datetime
 
 from pydantic import BaseModel, ConfigDict
 
 
+class StepOutcomes(enum.StrEnum):
+    succeeded = "succeeded"
+    failed = "failed"
+    retried = "retried"
+
+
 class MessageBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     body: str
     task_id: int
+    step_name: str | None = None
+    duration_ms: float | None = None
+    attempt: int | None = None
+    outcome: StepOutcomes | None = None
 
 
 class MessageCreate(MessageBase):
@@ -21,3 +32,21 @@ class Message(MessageBase):
 
 class MessageList(BaseModel):
     messages: list[Message]
+    next_cursor: str | None = None
+
+
+class StepLatency(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    step_name: str
+    count: int
+    failed: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class StepLatencyList(BaseModel):
+    steps: list[StepLatency]
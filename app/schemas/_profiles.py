@@ -0,0 +1,6 @@
+import enum
+
+
+class ProfileFormats(enum.StrEnum):
+    pstats = "pstats"
+    text = "text"
@@ -12,6 +12,11 @@ class TaskStatuses(enum.StrEnum):
     in_progress = "in progress"
 
 
+class TaskViews(enum.StrEnum):
+    full = "full"
+    summary = "summary"
+
+
 class TaskBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -38,3 +43,17 @@ class Task(TaskBase):
 
 class TaskList(BaseModel):
     tasks: list[Task]
+    next_cursor: str | None = None
+
+
+class TaskSummary(TaskBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+    last_message: str | None
+
+
+class TaskSummaryList(BaseModel):
+    tasks: list[TaskSummary]
+    next_cursor: str | None = None
@@ -5,3 +5,75 @@ DB_FILE_NAME = f"{SOURCE_DIR}/database.db"
 DB_URL = f"sqlite+aiosqlite:///{DB_FILE_NAME}"
 DB_URL_MIGRATIONS = f"sqlite:///{DB_FILE_NAME}"
 CONNECT_ARGS = {"check_same_thread": False}
+
+DB_READ_POOL_SIZE = 5
+DB_READ_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30
+DB_JOURNAL_MODE = "WAL"
+DB_SYNCHRONOUS = "NORMAL"
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHE_SIZE = -64 * 1024
+DB_BUSY_TIMEOUT_MS = 5000
+
+JOB_WORKERS = 4
+JOB_LEASE_SECONDS = 60
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_ATTEMPTS = 3
+JOB_RUN_IN_API = True
+
+ADMISSION_MAX_PENDING_JOBS = 1000
+ADMISSION_REFRESH_SECONDS = 1.0
+ADMISSION_RETRY_AFTER_SECONDS = 5
+
+JOURNAL_FLUSH_INTERVAL = 0.05
+JOURNAL_MAX_BATCH_SIZE = 500
+
+EVENTS_QUEUE_SIZE = 1000
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_POLL_INTERVAL = 0.5
+
+GARAGE_CACHE_TTL = 5
+
+BULK_MAX_CARS = 1000
+
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 5
+
+GARAGE_BREAKER_FAILURE_RATE = 0.5
+GARAGE_BREAKER_WINDOW_SIZE = 20
+GARAGE_BREAKER_MIN_CALLS = 10
+GARAGE_BREAKER_OPEN_SECONDS = 30
+GARAGE_BREAKER_HALF_OPEN_CALLS = 1
+GARAGE_BULKHEAD_TIMEOUT = 5
+GARAGE_BULKHEAD_LIMITS = {
+    "get_car_list": 10,
+    "check": 20,
+    "get_problems": 20,
+    "check_many": 20,
+    "get_problems_many": 20,
+    "add_problem": 10,
+    "fix_problems": 10,
+    "update_status": 5,
+}
+
+GARAGE_BATCH_WINDOW = 0.005
+GARAGE_BATCH_MAX_SIZE = 100
+
+PROFILING_ENABLED = False
+PROFILING_THRESHOLD_SECONDS = 0.5
+PROFILING_BUFFER_SIZE = 20
+PROFILING_HEADER = "X-Profile"
+PROFILING_HEADER_ENABLED = False
+
+IDEMPOTENCY_WINDOW_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_CACHE_SIZE = 10_000
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+RETENTION_ENABLED = False
+RETENTION_MAX_AGE_DAYS: float | None = 30
+RETENTION_MAX_TASKS: int | None = 100_000
+RETENTION_BATCH_SIZE = 500
+RETENTION_INTERVAL_SECONDS = 3600
+RETENTION_VACUUM_PAGES = 1000
+RETENTION_ARCHIVE_DIR: Path = SOURCE_DIR / "archive"
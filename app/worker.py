@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import logging
+import signal
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import db, settings
+from app.garage import GarageClient
+from app.helpers import create_garage_clients
+from app.jobs import JobQueue
+from app.journal import MessageJournal
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Worker:
+    """
+    Runs workflows outside the API process. Jobs are claimed from the
+    database with leases, so any number of workers can run next to the
+    API processes, and the jobs of a crashed worker are picked up again
+    once their lease expires.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        garage_client: GarageClient | None = None,
+        concurrency: int = settings.JOB_WORKERS,
+        lease_seconds: float = settings.JOB_LEASE_SECONDS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+    ):
+        self.journal = MessageJournal(session_maker)
+        self.job_queue = JobQueue(
+            session_maker,
+            self.journal,
+            garage_client or create_garage_clients()[1],
+            concurrency=concurrency,
+            lease_seconds=lease_seconds,
+            poll_interval=poll_interval,
+        )
+
+    async def start(self) -> None:
+        await self.journal.start()
+        await self.job_queue.resume()
+        await self.job_queue.start()
+        logger.info(
+            "worker %s started with %s job workers",
+            self.job_queue.worker_id,
+            self.job_queue.concurrency,
+        )
+
+    async def stop(self) -> None:
+        await self.job_queue.stop()
+        await self.journal.stop()
+        logger.info("worker %s stopped", self.job_queue.worker_id)
+
+
+def _stop_on_signals(stopped: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopped.set)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers.
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stopped.set))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    engine = db.create_engine()
+    read_engine = db.create_engine(read_only=True)
+    worker = Worker(
+        db.create_session_maker(engine, read_engine),
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+    )
+    stopped = asyncio.Event()
+    _stop_on_signals(stopped)
+    try:
+        await worker.start()
+        await stopped.wait()
+    finally:
+        # Running jobs are queued again and resume from their checkpoints.
+        await worker.stop()
+        await read_engine.dispose()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.worker",
+        description="Claim queued jobs from the database and run their workflows.",
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKERS)
+    parser.add_argument(
+        "--lease-seconds", type=float, default=settings.JOB_LEASE_SECONDS
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL
+    )
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        # Ctrl+C before the handlers were set, _main was cancelled and
+        # has stopped the worker.
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from ._run import BenchmarkConfig, run_benchmark, write_results
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from ._run import BenchmarkConfig, run_benchmark, write_results
+
+
+def main() -> None:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Benchmark the API and the background workflows in-process.",
+    )
+    parser.add_argument(
+        "--garage-latency",
+        type=float,
+        default=defaults.garage_latency,
+        help="seconds every garage call takes",
+    )
+    parser.add_argument(
+        "--update-status-probability",
+        type=int,
+        default=defaults.update_status_probability,
+        help="chance in percent that a status update succeeds",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=defaults.requests,
+        help="requests sent to every read endpoint",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=defaults.concurrency,
+        help="requests in flight at the same time",
+    )
+    parser.add_argument(
+        "--workflows",
+        type=int,
+        default=defaults.workflows,
+        help="workflows started with every action endpoint",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark.json"), help="result file"
+    )
+    args = parser.parse_args()
+    config = BenchmarkConfig(
+        garage_latency=args.garage_latency,
+        update_status_probability=args.update_status_probability,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        workflows=args.workflows,
+    )
+    results = asyncio.run(run_benchmark(config))
+    write_results(results, args.output)
+    for name, result in results["results"].items():
+        for part, summary in result.items() if "endpoint" in result else [("", result)]:
+            latency = summary["latency_ms"]
+            print(
+                f"{name} {part}".strip(),
+                f"{summary['requests_per_second']:.1f}/s",
+                f"p50={latency['p50']:.1f}ms",
+                f"p95={latency['p95']:.1f}ms",
+                f"p99={latency['p99']:.1f}ms",
+            )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+from app import models, schemas
+from app.events import TaskEventHub
+
+FINAL_STATUSES = {schemas.TaskStatuses.completed, schemas.TaskStatuses.failed}
+
+
+class RecordingEventHub(TaskEventHub):
+    """
+    Remembers when every task got its final status.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.finished_at: dict[int, float] = {}
+        self._changed = asyncio.Event()
+
+    def publish_status(self, task: models.Task) -> None:
+        if task.status in FINAL_STATUSES:
+            self.finished_at[task.id] = time.perf_counter()
+            self._changed.set()
+        super().publish_status(task)
+
+    async def wait_finished(self, task_ids: list[int]) -> None:
+        while not all(task_id in self.finished_at for task_id in task_ids):
+            self._changed.clear()
+            await self._changed.wait()
@@ -0,0 +1,12 @@
+from app.garage import GarageClient
+
+
+class LatencyGarageClient(GarageClient):
+    """
+    GarageClient with a configurable round trip time and update status
+    success chance, so runs do not depend on the hard-coded defaults.
+    """
+
+    def __init__(self, latency: float, update_status_probability: int = 100):
+        self.SLEEP_DURATION = latency
+        self.UPDATE_STATUS_PROBABILITY = update_status_probability
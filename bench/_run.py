@@ -0,0 +1,96 @@
+import json
+import platform
+import tempfile
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app import helpers
+from app.main import app
+from app.models import Base
+
+from ._events import RecordingEventHub
+from ._garage import LatencyGarageClient
+from ._scenarios import CAR_IDS, run_endpoint, run_workflows
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    garage_latency: float = 0.05
+    update_status_probability: int = 100
+    requests: int = 200
+    concurrency: int = 10
+    workflows: int = 40
+
+
+async def _start(
+    app: FastAPI, db_url: str, config: BenchmarkConfig
+) -> RecordingEventHub:
+    await helpers.init_db_state(app, db_url)
+    async with app.state.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    helpers.init_garage_state(
+        app,
+        LatencyGarageClient(config.garage_latency, config.update_status_probability),
+    )
+    events = RecordingEventHub()
+    await helpers.start_job_queue(app, events)
+    return events
+
+
+async def run_benchmark(config: BenchmarkConfig) -> dict:
+    """
+    Runs the app in-process on a throwaway database: first the action
+    workflows, then the read endpoints over the data the workflows left.
+    """
+    started_at = datetime.now().isoformat(timespec="seconds")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_url = f"sqlite+aiosqlite:///{Path(tmp_dir) / 'benchmark.db'}"
+        events = await _start(app, db_url, config)
+        try:
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://bench"
+            ) as client:
+                results = {}
+                for action in ("check", "send_for_repair", "send_to_parking"):
+                    results[f"POST /cars/{{car_id}}/actions/{action}"] = (
+                        await run_workflows(
+                            client,
+                            events,
+                            action,
+                            config.workflows,
+                            config.concurrency,
+                        )
+                    )
+                reads = {
+                    "GET /cars": lambda number: "/cars",
+                    "GET /tasks": lambda number: "/tasks?limit=50",
+                    "GET /tasks?view=summary": (
+                        lambda number: "/tasks?limit=50&view=summary"
+                    ),
+                    "GET /tasks/{task_id}": (
+                        lambda number: f"/tasks/{number % config.workflows + 1}"
+                    ),
+                    "GET /messages": lambda number: "/messages?limit=50",
+                }
+                for name, url in reads.items():
+                    results[name] = await run_endpoint(
+                        client, "GET", url, config.requests, config.concurrency
+                    )
+        finally:
+            await helpers.stop_job_queue(app)
+            await helpers.close_db_state(app)
+    return {
+        "started_at": started_at,
+        "python": platform.python_version(),
+        "config": asdict(config),
+        "cars": CAR_IDS,
+        "results": results,
+    }
+
+
+def write_results(results: dict, output: Path) -> None:
+    output.write_text(json.dumps(results, indent=2) + "\n")
@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable
+
+from httpx import AsyncClient, Response
+
+from ._events import RecordingEventHub
+from ._stats import summarize
+
+CAR_IDS = ["car_1", "car_2", "car_3", "car_4"]
+
+
+async def _drive(
+    requests: int, concurrency: int, send: Callable[[int], Awaitable[Response]]
+) -> tuple[list[tuple[float, Response]], list[float], int, float]:
+    """
+    Sends `requests` requests from `concurrency` concurrent senders.
+    """
+    counter = itertools.count()
+    responses = []
+    latencies = []
+    errors = 0
+
+    async def sender():
+        nonlocal errors
+        while (number := next(counter)) < requests:
+            started = time.perf_counter()
+            response = await send(number)
+            latencies.append(time.perf_counter() - started)
+            if response.is_error:
+                errors += 1
+            responses.append((started, response))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[sender() for _ in range(concurrency)])
+    return responses, latencies, errors, time.perf_counter() - started
+
+
+async def run_endpoint(
+    client: AsyncClient,
+    method: str,
+    url: Callable[[int], str],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    _responses, latencies, errors, elapsed = await _drive(
+        requests, concurrency, lambda number: client.request(method, url(number))
+    )
+    return summarize(latencies, elapsed, errors)
+
+
+async def run_workflows(
+    client: AsyncClient,
+    events: RecordingEventHub,
+    action: str,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """
+    Measures the action endpoint and, separately, the time from sending
+    the action (which creates the task) until the task gets its final status.
+    """
+    query = "?problem=benchmark" if action == "send_for_repair" else ""
+
+    def url(number: int) -> str:
+        return f"/cars/{CAR_IDS[number % len(CAR_IDS)]}/actions/{action}{query}"
+
+    responses, latencies, errors, elapsed = await _drive(
+        requests, concurrency, lambda number: client.post(url(number))
+    )
+    started_at = {
+        response.json()["id"]: started
+        for started, response in responses
+        if not response.is_error
+    }
+    await events.wait_finished(list(started_at))
+    durations = [
+        events.finished_at[task_id] - started for task_id, started in started_at.items()
+    ]
+    first_started = min(started_at.values(), default=0.0)
+    last_finished = max(map(events.finished_at.get, started_at), default=0.0)
+    return {
+        "endpoint": summarize(latencies, elapsed, errors),
+        "workflow": summarize(durations, last_finished - first_started),
+    }
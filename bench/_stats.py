@@ -0,0 +1,30 @@
+import math
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of `values`, `percent` is from 0 to 100.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """
+    Latencies are in seconds, the summary reports them in milliseconds.
+    """
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": 1000 * percentile(latencies, 50),
+            "p95": 1000 * percentile(latencies, 95),
+            "p99": 1000 * percentile(latencies, 99),
+            "max": 1000 * max(latencies, default=0.0),
+        },
+    }
@@ -2,42 +2,150 @@ from typing import Any, AsyncGenerator
 
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.dependencies import get_garage_client, get_session
-from app.garage import GarageClient
+from app import db
+from app.admission import AdmissionControl
+from app.dependencies import (
+    get_admission,
+    get_events,
+    get_garage_client,
+    get_garage_guard,
+    get_idempotency_keys,
+    get_job_queue,
+    get_journal,
+    get_session,
+    get_session_maker,
+)
+from app.events import TaskEventHub
+from app.garage import (
+    BatchingGarageClient,
+    CachedGarageClient,
+    GarageClient,
+    GuardedGarageClient,
+    InstrumentedGarageClient,
+)
+from app.idempotency import IdempotencyKeys
+from app.jobs import JobQueue
+from app.journal import MessageJournal
 from app.main import app
 from app.models import Base
 
+TEST_DB_URL = "sqlite+aiosqlite:///tests/fake_database.db"
+
 
 class FakeGarageClient(GarageClient):
     UPDATE_STATUS_PROBABILITY = 100
     SLEEP_DURATION = 0
 
 
-@pytest_asyncio.fixture(name="async_session")
-async def session_fixture() -> AsyncGenerator[AsyncSession, Any]:
-    engine = create_async_engine("sqlite+aiosqlite:///tests/fake_database.db")
+@pytest_asyncio.fixture(name="session_maker")
+async def session_maker_fixture() -> (
+    AsyncGenerator[async_sessionmaker[AsyncSession], Any]
+):
+    engine = db.create_engine(TEST_DB_URL)
+    read_engine = db.create_engine(TEST_DB_URL, read_only=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
-    async with async_session() as session:
-        yield session
+    yield db.create_session_maker(engine, read_engine)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    await read_engine.dispose()
     await engine.dispose()
 
 
+@pytest_asyncio.fixture(name="async_session")
+async def session_fixture(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> AsyncGenerator[AsyncSession, Any]:
+    async with session_maker() as session:
+        yield session
+
+
+@pytest_asyncio.fixture(name="event_hub")
+async def event_hub_fixture() -> TaskEventHub:
+    return TaskEventHub()
+
+
+@pytest_asyncio.fixture(name="journal")
+async def journal_fixture(
+    session_maker: async_sessionmaker[AsyncSession],
+    event_hub: TaskEventHub,
+) -> AsyncGenerator[MessageJournal, Any]:
+    journal = MessageJournal(session_maker, flush_interval=0.01, events=event_hub)
+    await journal.start()
+    yield journal
+    await journal.stop()
+
+
+@pytest_asyncio.fixture(name="job_queue")
+async def job_queue_fixture(
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+    event_hub: TaskEventHub,
+) -> AsyncGenerator[JobQueue, Any]:
+    job_queue = JobQueue(
+        session_maker,
+        journal,
+        BatchingGarageClient(FakeGarageClient()),
+        poll_interval=0.01,
+        events=event_hub,
+    )
+    await job_queue.start()
+    yield job_queue
+    await job_queue.stop()
+
+
 @pytest_asyncio.fixture(name="async_client")
-async def client_fixture(async_session: AsyncSession):
+async def client_fixture(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+    job_queue: JobQueue,
+    event_hub: TaskEventHub,
+):
     def get_session_override():
         return async_session
 
+    def get_session_maker_override():
+        return session_maker
+
+    garage_guard = GuardedGarageClient(InstrumentedGarageClient(FakeGarageClient()))
+    garage_client = CachedGarageClient(BatchingGarageClient(garage_guard))
+
     def get_garage_client_override():
-        return FakeGarageClient()
+        return garage_client
+
+    def get_garage_guard_override():
+        return garage_guard
+
+    def get_job_queue_override():
+        return job_queue
+
+    def get_journal_override():
+        return journal
+
+    def get_events_override():
+        return event_hub
+
+    idempotency_keys = IdempotencyKeys()
+    admission = AdmissionControl(session_maker)
+
+    def get_admission_override():
+        return admission
+
+    def get_idempotency_keys_override():
+        return idempotency_keys
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_session_maker] = get_session_maker_override
     app.dependency_overrides[get_garage_client] = get_garage_client_override
+    app.dependency_overrides[get_garage_guard] = get_garage_guard_override
+    app.dependency_overrides[get_job_queue] = get_job_queue_override
+    app.dependency_overrides[get_journal] = get_journal_override
+    app.dependency_overrides[get_events] = get_events_override
+    app.dependency_overrides[get_idempotency_keys] = get_idempotency_keys_override
+    app.dependency_overrides[get_admission] = get_admission_override
     async with AsyncClient(
         transport=ASGITransport(app=app),
         base_url="http://test",
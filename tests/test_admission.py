@@ -0,0 +1,119 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import metrics
+from app.admission import AdmissionControl, AdmissionRejectedError
+from app.dependencies import get_admission
+from app.idempotency import IdempotencyKeys
+from app.main import app
+from app.repo import enqueue_task
+
+
+@pytest.mark.asyncio
+async def test_admission_caps_pending_workflows(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    admission = AdmissionControl(session_maker, max_pending=3, retry_after=7)
+    rejections = metrics.WORKFLOW_ADMISSION_REJECTIONS.value()
+
+    await admission.admit(2)
+    await admission.admit()
+    with pytest.raises(AdmissionRejectedError) as exc_info:
+        await admission.admit()
+
+    assert exc_info.value.retry_after == 7
+    assert admission.stats.queue_depth == 3
+    assert admission.stats.admitted == 3
+    assert admission.stats.rejected == 1
+    assert admission.stats.refreshes == 1
+    assert metrics.WORKFLOW_ADMISSION_REJECTIONS.value() == rejections + 1
+
+
+@pytest.mark.asyncio
+async def test_admission_reads_queue_depth(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    for car_id in ("car_1", "car_2"):
+        payload = {"car_id": car_id}
+        await enqueue_task(f"check {car_id}", car_id, "check", payload, async_session)
+    admission = AdmissionControl(session_maker, max_pending=2, refresh_interval=0)
+
+    with pytest.raises(AdmissionRejectedError):
+        await admission.admit()
+    assert admission.stats.queue_depth == 2
+    assert metrics.WORKFLOW_QUEUE_DEPTH.value() == 2
+
+
+@pytest.mark.asyncio
+async def test_action_is_rejected_when_queue_is_full(
+    async_client: AsyncClient, session_maker: async_sessionmaker[AsyncSession]
+):
+    admission = AdmissionControl(
+        session_maker, max_pending=1, refresh_interval=60, retry_after=3
+    )
+    app.dependency_overrides[get_admission] = lambda: admission
+
+    accepted = await async_client.post("/cars/car_1/actions/check")
+    rejected = await async_client.post("/cars/car_2/actions/check")
+    bulk = await async_client.post("/cars/actions/check", json={"car_ids": ["car_3"]})
+    stats = await async_client.get("/cars/admission")
+
+    assert accepted.status_code == status.HTTP_200_OK
+    assert rejected.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert rejected.headers["Retry-After"] == "3"
+    assert bulk.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert stats.json() == {
+        "max_pending": 1,
+        "queue_depth": 1,
+        "admitted": 1,
+        "rejected": 2,
+        "refreshes": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_replays_and_rejected_requests_are_not_charged(
+    async_client: AsyncClient, session_maker: async_sessionmaker[AsyncSession]
+):
+    admission = AdmissionControl(session_maker, max_pending=1, refresh_interval=60)
+    app.dependency_overrides[get_admission] = lambda: admission
+    headers = {"Idempotency-Key": "key-1"}
+
+    first = await async_client.post("/cars/car_1/actions/check", headers=headers)
+    replay = await async_client.post("/cars/car_1/actions/check", headers=headers)
+    reused = await async_client.post("/cars/car_2/actions/check", headers=headers)
+    invalid = await async_client.post(
+        "/cars/actions/send_for_repair", json={"car_ids": ["car_3"]}
+    )
+    stats = await async_client.get("/cars/admission")
+
+    assert first.status_code == status.HTTP_200_OK
+    assert replay.status_code == status.HTTP_200_OK
+    assert replay.json()["id"] == first.json()["id"]
+    assert reused.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert invalid.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert stats.json()["queue_depth"] == 1
+    assert stats.json()["admitted"] == 1
+    assert stats.json()["rejected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stored_key_is_replayed_when_queue_is_full(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    payload = {"car_id": "car_1"}
+    first = await IdempotencyKeys().enqueue_task(
+        "key-1", "check 'car_1'", "car_1", "check", payload, async_session
+    )
+    admission = AdmissionControl(session_maker, max_pending=1)
+
+    # Another process, or an entry evicted from the LRU.
+    second = await IdempotencyKeys(cache_size=0).enqueue_task(
+        "key-1", "check 'car_1'", "car_1", "check", payload, async_session, admission
+    )
+
+    assert second.id == first.id
+    assert admission.stats.admitted == 0
+    assert admission.stats.rejected == 1
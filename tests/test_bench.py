@@ -0,0 +1,37 @@
+import pytest
+
+from bench import BenchmarkConfig, run_benchmark
+from bench._stats import percentile, summarize
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3
+    assert percentile([], 50) == 0
+
+
+def test_summarize_reports_milliseconds():
+    summary = summarize([0.1, 0.2, 0.3, 0.4], elapsed=2, errors=1)
+
+    assert summary["count"] == 4
+    assert summary["errors"] == 1
+    assert summary["requests_per_second"] == 2
+    assert summary["latency_ms"]["p50"] == pytest.approx(200)
+    assert summary["latency_ms"]["max"] == pytest.approx(400)
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_reports_every_scenario():
+    config = BenchmarkConfig(garage_latency=0, requests=4, concurrency=2, workflows=2)
+
+    results = await run_benchmark(config)
+
+    assert results["config"]["workflows"] == 2
+    workflow = results["results"]["POST /cars/{car_id}/actions/send_for_repair"]
+    assert workflow["endpoint"]["count"] == 2
+    assert workflow["workflow"]["count"] == 2
+    assert results["results"]["GET /messages"]["count"] == 4
+    assert results["results"]["GET /messages"]["errors"] == 0
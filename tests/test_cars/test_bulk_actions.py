@@ -0,0 +1,49 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.jobs import JobQueue
+
+
+@pytest.mark.asyncio
+async def test_bulk_check(
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
+):
+    response = await async_client.post(
+        "/cars/actions/check", json={"car_ids": ["car_1", "car_2", "invalid_car"]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"task_ids": [1, 2, 3]}
+
+    await job_queue.wait_idle()
+    result = await async_session.execute(
+        select(models.Task)
+        .order_by(models.Task.id)
+        .execution_options(populate_existing=True)
+    )
+    tasks = result.scalars().all()
+    assert [(task.name, task.status) for task in tasks] == [
+        ("check 'car_1'", schemas.TaskStatuses.completed),
+        ("check 'car_2'", schemas.TaskStatuses.completed),
+        ("check 'invalid_car'", schemas.TaskStatuses.failed),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_for_repair_requires_problem(async_client: AsyncClient):
+    response = await async_client.post(
+        "/cars/actions/send_for_repair", json={"car_ids": ["car_1"]}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json() == {"detail": "Problem is required to send cars for repair"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_unknown_action(async_client: AsyncClient):
+    response = await async_client.post(
+        "/cars/actions/paint", json={"car_ids": ["car_1"]}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -14,3 +14,44 @@ async def test_get_cars(async_client: AsyncClient):
         {"car_id": "car_3", "problems": [], "status": "ok"},
         {"car_id": "car_4", "problems": [], "status": "ok"},
     ]
+
+
+@pytest.mark.asyncio
+async def test_read_cars_cache_stats(async_client: AsyncClient):
+    await async_client.get("/cars")
+    await async_client.get("/cars")
+    response = await async_client.get("/cars/cache")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "hits": 1,
+        "misses": 1,
+        "coalesced": 0,
+        "invalidations": 0,
+        "reads_coalesced": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_cars_queues(async_client: AsyncClient):
+    response = await async_client.get("/cars/queues")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {}
+
+
+@pytest.mark.asyncio
+async def test_read_garage_breaker(async_client: AsyncClient):
+    await async_client.get("/cars")
+    response = await async_client.get("/cars/breaker")
+    assert response.status_code == status.HTTP_200_OK
+    response_json = response.json()
+    assert response_json["breaker"] == {
+        "state": "closed",
+        "failure_rate": 0.0,
+        "calls_in_window": 1,
+        "rejected": 0,
+    }
+    assert response_json["bulkheads"]["check"] == {
+        "limit": 20,
+        "in_use": 0,
+        "rejected": 0,
+    }
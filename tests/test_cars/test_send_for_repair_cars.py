@@ -1,13 +1,17 @@
 import pytest
 from fastapi import status
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.jobs import JobQueue
 
 
 @pytest.mark.asyncio
-async def test_send_for_repair(async_client: AsyncClient, async_session: AsyncSession):
+async def test_send_for_repair(
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
+):
     car_id = "car_1"
     test_problem = "test car problem"
     response = await async_client.post(
@@ -26,7 +30,10 @@ async def test_send_for_repair(async_client: AsyncClient, async_session: AsyncSe
     assert "created_at" in response_json
     assert "updated_at" in response_json
 
-    task = await async_session.get(models.Task, response_json["id"])
+    await job_queue.wait_idle()
+    task = await async_session.get(
+        models.Task, response_json["id"], populate_existing=True
+    )
     assert task.status == schemas.TaskStatuses.completed
     assert [msg.body for msg in task.messages] == [
         "Start send car 'car_1' for repair with problem 'test car problem'",
@@ -41,7 +48,7 @@ async def test_send_for_repair(async_client: AsyncClient, async_session: AsyncSe
 
 @pytest.mark.asyncio
 async def test_repair_error_while_trying_to_check(
-    async_client: AsyncClient, async_session: AsyncSession
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
 ):
     car_id = "invalid_repair_car"
     test_problem = "test car problem"
@@ -50,10 +57,36 @@ async def test_repair_error_while_trying_to_check(
     )
     assert response.status_code == status.HTTP_200_OK
     response_json = response.json()
-    task = await async_session.get(models.Task, response_json["id"])
+    await job_queue.wait_idle()
+    task = await async_session.get(
+        models.Task, response_json["id"], populate_existing=True
+    )
     assert task.status == schemas.TaskStatuses.failed
     assert [msg.body for msg in task.messages] == [
         f"Start send car '{car_id}' for repair with problem '{test_problem}'",
         "Error while trying to check car 'invalid_repair_car'!",
         "End send car 'invalid_repair_car' for repair with problem 'test car problem'",
     ]
+
+
+@pytest.mark.asyncio
+async def test_send_for_repair_with_idempotency_key(
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
+):
+    url = "/cars/car_1/actions/send_for_repair?problem=flat tire"
+    headers = {"Idempotency-Key": "repair-car_1-1"}
+    first = await async_client.post(url, headers=headers)
+    second = await async_client.post(url, headers=headers)
+    other = await async_client.post(
+        "/cars/car_1/actions/send_for_repair?problem=broken mirror", headers=headers
+    )
+    await job_queue.wait_idle()
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json()["id"] == first.json()["id"]
+    assert other.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    tasks = await async_session.scalars(select(models.Task))
+    assert len(tasks.all()) == 1
+    stats = (await async_client.get("/cars/idempotency")).json()
+    assert stats == {"hits": 2, "misses": 1, "replays": 1, "conflicts": 1}
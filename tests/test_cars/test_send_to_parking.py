@@ -4,10 +4,13 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.jobs import JobQueue
 
 
 @pytest.mark.asyncio
-async def test_send_to_parkingr(async_client: AsyncClient, async_session: AsyncSession):
+async def test_send_to_parkingr(
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
+):
     car_id = "car_3"
     response = await async_client.post(f"/cars/{car_id}/actions/send_to_parking")
     assert response.status_code == status.HTTP_200_OK
@@ -20,7 +23,10 @@ async def test_send_to_parkingr(async_client: AsyncClient, async_session: AsyncS
     assert "created_at" in response_json
     assert "updated_at" in response_json
 
-    task = await async_session.get(models.Task, response_json["id"])
+    await job_queue.wait_idle()
+    task = await async_session.get(
+        models.Task, response_json["id"], populate_existing=True
+    )
     assert task.status == schemas.TaskStatuses.completed
     assert [msg.body for msg in task.messages] == [
         "Start send car 'car_3' to parking",
@@ -35,13 +41,16 @@ async def test_send_to_parkingr(async_client: AsyncClient, async_session: AsyncS
 
 @pytest.mark.asyncio
 async def test_parking_error_while_trying_to_check(
-    async_client: AsyncClient, async_session: AsyncSession
+    async_client: AsyncClient, async_session: AsyncSession, job_queue: JobQueue
 ):
     car_id = "invalid_parking_car"
     response = await async_client.post(f"/cars/{car_id}/actions/send_to_parking")
     assert response.status_code == status.HTTP_200_OK
     response_json = response.json()
-    task = await async_session.get(models.Task, response_json["id"])
+    await job_queue.wait_idle()
+    task = await async_session.get(
+        models.Task, response_json["id"], populate_existing=True
+    )
     assert task.status == schemas.TaskStatuses.failed
     assert [msg.body for msg in task.messages] == [
         "Start send car 'invalid_parking_car' to parking",
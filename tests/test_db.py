@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import db, helpers, models, schemas, settings
+from app.dependencies import get_read_engine, get_sql_engine
+from app.main import app
+from app.repo import create_task, read_tasks
+
+from .conftest import TEST_DB_URL
+
+
+@pytest.mark.asyncio
+async def test_pool_stats():
+    engine = db.create_engine(TEST_DB_URL)
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+    stats = db.get_pool_stats(engine)
+    await engine.dispose()
+
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["checked_out"] == 0
+    assert stats["wait_seconds_total"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_count_only_timeouts(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.1)
+    engine = db.create_engine(TEST_DB_URL)
+    async with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            await engine.connect().start()
+    stats = db.get_pool_stats(engine)
+    await engine.dispose()
+
+    missing = db.create_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/db.sqlite")
+    with pytest.raises(exc.OperationalError):
+        await missing.connect().start()
+    missing_stats = db.get_pool_stats(missing)
+    await missing.dispose()
+
+    assert stats["timeouts"] == 1
+    assert missing_stats["timeouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lifespan_owns_engine(
+    monkeypatch: pytest.MonkeyPatch,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    # The schema is created by the session_maker fixture, the real
+    # database is never touched.
+    monkeypatch.setattr(settings, "DB_URL", TEST_DB_URL)
+    test_app = FastAPI()
+    async with helpers.lifespan(test_app):
+        assert test_app.state.engine.pool.size() == 1
+        assert test_app.state.read_engine.pool.size() == 5
+        assert test_app.state.session_maker.kw["bind"] is test_app.state.engine
+    assert test_app.state.engine.pool.checkedin() == 0
+    assert test_app.state.read_engine.pool.checkedin() == 0
+
+
+@pytest.mark.asyncio
+async def test_read_pool_stats(async_client: AsyncClient):
+    engine = db.create_engine(TEST_DB_URL)
+    read_engine = db.create_engine(TEST_DB_URL, read_only=True)
+    app.dependency_overrides[get_sql_engine] = lambda: engine
+    app.dependency_overrides[get_read_engine] = lambda: read_engine
+    response = await async_client.get("/db/pool")
+    await read_engine.dispose()
+    await engine.dispose()
+    assert response.status_code == status.HTTP_200_OK
+    response_json = response.json()
+    assert response_json["writer"]["size"] == 1
+    assert response_json["readers"]["size"] == 5
+    assert response_json["readers"]["checkouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_connections_are_configured():
+    engine = db.create_engine(TEST_DB_URL)
+    read_engine = db.create_engine(TEST_DB_URL, read_only=True)
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+        synchronous = await conn.scalar(text("PRAGMA synchronous"))
+        busy_timeout = await conn.scalar(text("PRAGMA busy_timeout"))
+        writer_query_only = await conn.scalar(text("PRAGMA query_only"))
+    async with read_engine.connect() as conn:
+        reader_query_only = await conn.scalar(text("PRAGMA query_only"))
+    await read_engine.dispose()
+    await engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    assert busy_timeout == settings.DB_BUSY_TIMEOUT_MS
+    assert writer_query_only == 0
+    assert reader_query_only == 1
+
+
+@pytest.mark.asyncio
+async def test_session_routes_reads_to_readers(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    writer = session_maker.kw["bind"].pool.stats
+    readers = session_maker.kw["reader"].pool.stats
+
+    def checkouts() -> tuple[int, int]:
+        return writer.checkouts, readers.checkouts
+
+    start_writer, start_readers = checkouts()
+    async with session_maker() as session:
+        await read_tasks(session)
+        assert checkouts() == (start_writer, start_readers + 1)
+        await create_task("check 'car_1'", "car_1", session)
+        assert checkouts() == (start_writer + 1, start_readers + 2)
+
+    async with session_maker() as session:
+        session.add(
+            models.Task(
+                name="check 'car_2'",
+                car_id="car_2",
+                status=schemas.TaskStatuses.in_progress,
+            )
+        )
+        await session.flush()
+        # The transaction wrote, so it reads its own changes on the writer.
+        assert len(await read_tasks(session)) == 2
+        assert checkouts() == (start_writer + 2, start_readers + 2)
+        await session.rollback()
+        assert len(await read_tasks(session)) == 1
+        assert checkouts() == (start_writer + 2, start_readers + 3)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_commit_does_not_block_writes(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    async def write():
+        async with session_maker() as session:
+            await create_task("test task", "car_1", session)
+
+    # Cancels the write at every point of its way through the commit,
+    # like a client disconnecting mid-request.
+    for ticks in range(30):
+        request = asyncio.create_task(write())
+        for _ in range(ticks):
+            await asyncio.sleep(0)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+
+        await asyncio.wait_for(write(), 3)
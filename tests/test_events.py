@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas, settings
+from app.events import TaskEventHub
+
+
+def _parse_events(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_event_hub_publish():
+    event_hub = TaskEventHub()
+    subscription = event_hub.subscribe(1)
+    other = event_hub.subscribe(2)
+
+    event_hub.publish(1, "status", {"task_id": 1, "status": "completed"})
+    assert subscription.queue.get_nowait() == (
+        "status",
+        {"task_id": 1, "status": "completed"},
+    )
+    assert other.queue.empty()
+
+    subscription.close()
+    other.close()
+    event_hub.publish(1, "status", {})
+    assert subscription.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_read_task_events(async_client: AsyncClient):
+    response = await async_client.post("/cars/car_3/actions/send_to_parking")
+    task_id = response.json()["id"]
+
+    response = await async_client.get(f"/tasks/{task_id}/events")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    assert [data["body"] for kind, data in events if kind == "message"] == [
+        "Start send car 'car_3' to parking",
+        "Ping 'car_3': Ok",
+        "Car 'car_3' problems: []",
+        "Car 'car_3' problems after fixing: []",
+        "Car 'car_3' problems: []",
+        "Car 'car_3' status after update: ok",
+        "End send car 'car_3' to parking",
+    ]
+    assert events[-1] == ("status", {"task_id": task_id, "status": "completed"})
+
+
+@pytest.mark.asyncio
+async def test_read_task_events_of_finished_task(
+    async_client: AsyncClient, async_session: AsyncSession
+):
+    task = models.Task(name="test task", car_id="car_1", status="failed")
+    async_session.add(task)
+    await async_session.commit()
+    async_session.add(models.Message(body="test msg", task_id=task.id))
+    await async_session.commit()
+
+    response = await async_client.get(f"/tasks/{task.id}/events")
+    events = _parse_events(response.text)
+    assert [kind for kind, _data in events] == ["message", "status"]
+    assert events[0][1]["body"] == "test msg"
+    assert events[1] == ("status", {"task_id": task.id, "status": "failed"})
+
+
+@pytest.mark.asyncio
+async def test_read_events_of_invalid_task(async_client: AsyncClient):
+    response = await async_client.get("/tasks/1/events")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Task with id=1 not found"}
+
+
+@pytest.mark.asyncio
+async def test_read_events_of_task_run_by_worker(
+    monkeypatch: pytest.MonkeyPatch,
+    async_client: AsyncClient,
+    async_session: AsyncSession,
+):
+    monkeypatch.setattr(settings, "JOB_RUN_IN_API", False)
+    task = models.Task(
+        name="test task", car_id="car_1", status=schemas.TaskStatuses.in_progress
+    )
+    async_session.add(task)
+    await async_session.commit()
+    async_session.add(models.Message(body="first msg", task_id=task.id))
+    await async_session.commit()
+
+    request = asyncio.create_task(async_client.get(f"/tasks/{task.id}/events"))
+    await asyncio.sleep(0.1)
+    # What a worker process writes while the stream is open.
+    async_session.add(models.Message(body="second msg", task_id=task.id))
+    task.status = schemas.TaskStatuses.completed
+    await async_session.commit()
+    response = await asyncio.wait_for(request, 5)
+
+    events = _parse_events(response.text)
+    assert [data["body"] for kind, data in events if kind == "message"] == [
+        "first msg",
+        "second msg",
+    ]
+    assert events[-1] == ("status", {"task_id": task.id, "status": "completed"})
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.garage import (
+    BatchingGarageClient,
+    GarageClientError,
+    GarageClientNotFoundError,
+)
+from app.helpers import create_garage_clients
+
+from ..conftest import FakeGarageClient
+
+
+class CountingGarageClient(FakeGarageClient):
+    SLEEP_DURATION = 0.01
+
+    def __init__(self):
+        self.batches = []
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        self.batches.append(("check_many", car_ids))
+        return await super().check_many(car_ids)
+
+    async def get_problems_many(self, car_ids: list[str]) -> dict:
+        self.batches.append(("get_problems_many", car_ids))
+        return await super().get_problems_many(car_ids)
+
+
+@pytest.mark.asyncio
+async def test_many_methods_skip_missing_cars():
+    client = FakeGarageClient()
+
+    assert await client.check_many(["car_1", "missing_car"]) == {"car_1": True}
+    problems = await client.get_problems_many(["car_1", "car_2", "missing_car"])
+    assert list(problems) == ["car_1", "car_2"]
+
+
+@pytest.mark.asyncio
+async def test_single_calls_within_window_share_one_batch():
+    client = CountingGarageClient()
+    batching = BatchingGarageClient(client, window=0.01)
+
+    results = await asyncio.gather(
+        batching.check("car_1"),
+        batching.check("car_2"),
+        batching.check("car_1"),
+        batching.get_problems("car_3"),
+    )
+
+    assert results == [{"car_1": True}, {"car_2": True}, {"car_1": True}, results[3]]
+    assert list(results[3]) == ["car_3"]
+    assert sorted(client.batches) == [
+        ("check_many", ["car_1", "car_2"]),
+        ("get_problems_many", ["car_3"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    client = CountingGarageClient()
+    batching = BatchingGarageClient(client, window=60, max_batch_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batching.check("car_1"), batching.check("car_2")), 1
+    )
+
+    assert results == [{"car_1": True}, {"car_2": True}]
+    assert batching.batches_sent == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_car_fails_only_its_own_call():
+    batching = BatchingGarageClient(CountingGarageClient(), window=0.01)
+
+    results = await asyncio.gather(
+        batching.check("car_1"), batching.check("missing_car"), return_exceptions=True
+    )
+
+    assert results[0] == {"car_1": True}
+    assert isinstance(results[1], GarageClientNotFoundError)
+
+
+class BlockedGarageClient(FakeGarageClient):
+    def __init__(self):
+        self.released = asyncio.Event()
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        await self.released.wait()
+        return await super().check_many(car_ids)
+
+
+@pytest.mark.asyncio
+async def test_batched_reads_take_one_bulkhead_slot():
+    client = BlockedGarageClient()
+    garage_guard, garage_client = create_garage_clients(client)
+
+    checks = [asyncio.create_task(garage_client.check(f"car_{n}")) for n in range(1, 5)]
+    await asyncio.sleep(0.05)
+    bulkheads = garage_guard.snapshot()["bulkheads"]
+    client.released.set()
+    await asyncio.gather(*checks)
+
+    assert bulkheads["check_many"]["in_use"] == 1
+    assert bulkheads["check"]["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_fails_its_callers():
+    batching = BatchingGarageClient(BlockedGarageClient(), window=0.01)
+
+    checks = [
+        asyncio.create_task(batching.check(car_id)) for car_id in ("car_1", "car_2")
+    ]
+    await asyncio.sleep(0.05)
+    for sending in list(batching._sending):
+        sending.cancel()
+    results = await asyncio.wait_for(asyncio.gather(*checks, return_exceptions=True), 1)
+
+    assert all(isinstance(result, GarageClientError) for result in results)
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from app.actions._garage import ActionsGarageError, _check
+from app.garage import (
+    CircuitBreaker,
+    CircuitStates,
+    GarageBulkheadFullError,
+    GarageCircuitOpenError,
+    GarageClientError,
+    GuardedGarageClient,
+)
+
+from ..conftest import FakeGarageClient
+
+
+class BrokenGarageClient(FakeGarageClient):
+    def __init__(self):
+        self.is_broken = True
+
+    async def check(self, car_id: str) -> dict:
+        if self.is_broken:
+            raise GarageClientError("garage is down")
+        return await super().check(car_id)
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    params = {"failure_rate_threshold": 0.5, "window_size": 4, "min_calls": 4}
+    return CircuitBreaker(**{**params, **kwargs})
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_failure_rate():
+    garage_client = GuardedGarageClient(BrokenGarageClient(), _breaker())
+
+    for _ in range(4):
+        with pytest.raises(GarageClientError):
+            await garage_client.check("car_1")
+
+    assert garage_client.breaker.state == CircuitStates.open
+    with pytest.raises(GarageCircuitOpenError):
+        await garage_client.check("car_1")
+    assert garage_client.breaker.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_missing_cars():
+    garage_client = GuardedGarageClient(FakeGarageClient(), _breaker())
+
+    for _ in range(4):
+        with pytest.raises(GarageClientError):
+            await garage_client.check("invalid_car")
+
+    assert garage_client.breaker.state == CircuitStates.closed
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_trial():
+    client = BrokenGarageClient()
+    garage_client = GuardedGarageClient(client, _breaker(open_seconds=0))
+    for _ in range(4):
+        with pytest.raises(GarageClientError):
+            await garage_client.check("car_1")
+    assert garage_client.breaker.state == CircuitStates.open
+
+    with pytest.raises(GarageClientError):
+        await garage_client.check("car_1")
+    assert garage_client.breaker.state == CircuitStates.open
+
+    client.is_broken = False
+    assert await garage_client.check("car_1") == {"car_1": True}
+    assert garage_client.breaker.state == CircuitStates.closed
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_step_fast():
+    breaker = _breaker()
+    breaker.state = CircuitStates.open
+    breaker._opened_at = float("inf")
+    garage_client = GuardedGarageClient(FakeGarageClient(), breaker)
+
+    with pytest.raises(ActionsGarageError) as exc_info:
+        await _check("car_1", garage_client)
+
+    assert str(exc_info.value) == (
+        "Error while trying to check car 'car_1'! Garage circuit is open!"
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_full():
+    class SlowGarageClient(FakeGarageClient):
+        SLEEP_DURATION = 0.1
+
+    garage_client = GuardedGarageClient(
+        SlowGarageClient(),
+        _breaker(),
+        bulkhead_limits={"check": 1, "update_status": 1},
+        bulkhead_timeout=0.01,
+    )
+
+    results = await asyncio.gather(
+        garage_client.update_status("car_4"),
+        garage_client.update_status("car_4"),
+        garage_client.check("car_4"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == {"car_4": "ok"}
+    assert isinstance(results[1], GarageBulkheadFullError)
+    assert results[2] == {"car_4": True}
+    assert garage_client.bulkheads["update_status"].rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_frees_its_slot():
+    class SlowGarageClient(FakeGarageClient):
+        SLEEP_DURATION = 1
+
+    breaker = _breaker(open_seconds=0)
+    breaker.state = CircuitStates.open
+    garage_client = GuardedGarageClient(SlowGarageClient(), breaker)
+
+    trial = asyncio.create_task(garage_client.check("car_1"))
+    await asyncio.sleep(0.01)
+    assert breaker.state == CircuitStates.half_open
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    garage_client.client.SLEEP_DURATION = 0
+    assert await garage_client.check("car_1") == {"car_1": True}
+    assert breaker.state == CircuitStates.closed
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_does_not_wait_for_bulkhead():
+    breaker = _breaker()
+    breaker.state = CircuitStates.open
+    breaker._opened_at = float("inf")
+    garage_client = GuardedGarageClient(
+        FakeGarageClient(), breaker, bulkhead_limits={"check": 1}, bulkhead_timeout=5
+    )
+    await garage_client.bulkheads["check"].__aenter__()
+
+    with pytest.raises(GarageCircuitOpenError):
+        await asyncio.wait_for(garage_client.check("car_1"), 0.5)
+    assert garage_client.bulkheads["check"].rejected == 0
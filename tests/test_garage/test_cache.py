@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.garage import CachedGarageClient
+
+from ..conftest import FakeGarageClient
+
+
+class CountingGarageClient(FakeGarageClient):
+    SLEEP_DURATION = 0.01
+
+    def __init__(self):
+        self.car_list_calls = 0
+        self.problems_calls = 0
+
+    async def get_car_list(self):
+        self.car_list_calls += 1
+        return await super().get_car_list()
+
+    async def get_problems(self, car_id: str) -> dict:
+        self.problems_calls += 1
+        return await super().get_problems(car_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call():
+    client = CountingGarageClient()
+    cache = CachedGarageClient(client, ttl=60)
+
+    results = await asyncio.gather(*[cache.get_car_list() for _ in range(10)])
+
+    assert client.car_list_calls == 1
+    assert all(result == results[0] for result in results)
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 9
+
+
+@pytest.mark.asyncio
+async def test_cached_car_list_expires():
+    client = CountingGarageClient()
+    cache = CachedGarageClient(client, ttl=60)
+
+    await cache.get_car_list()
+    await cache.get_car_list()
+    assert client.car_list_calls == 1
+    assert cache.stats.hits == 1
+
+    cache = CachedGarageClient(client, ttl=0)
+    await cache.get_car_list()
+    await cache.get_car_list()
+    assert client.car_list_calls == 3
+    assert cache.stats.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_mutation_invalidates_car_list():
+    client = CountingGarageClient()
+    cache = CachedGarageClient(client, ttl=60)
+
+    await cache.get_car_list()
+    await cache.add_problem("car_2", "flat tire")
+    car_list = await cache.get_car_list()
+    await cache.fix_problems("car_2")
+
+    assert client.car_list_calls == 2
+    assert cache.stats.invalidations == 2
+    assert car_list.cars[1].problems == ["flat tire"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_of_one_car_share_one_call():
+    client = CountingGarageClient()
+    cache = CachedGarageClient(client, ttl=60)
+
+    results = await asyncio.gather(
+        *[cache.get_problems("car_1") for _ in range(5)], cache.get_problems("car_2")
+    )
+
+    assert client.problems_calls == 2
+    assert all(result is results[0] for result in results[:5])
+    assert cache.stats.reads_coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_read_started_before_mutation_is_not_shared():
+    client = CountingGarageClient()
+    cache = CachedGarageClient(client, ttl=60)
+
+    stale = asyncio.create_task(cache.get_problems("car_3"))
+    await asyncio.sleep(0)
+    await cache.add_problem("car_3", "flat tire")
+    fresh = await cache.get_problems("car_3")
+    await stale
+    await cache.fix_problems("car_3")
+
+    assert client.problems_calls == 2
+    assert fresh == {"car_3": ["flat tire"]}
+    assert cache.stats.reads_coalesced == 0
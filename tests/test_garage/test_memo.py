@@ -0,0 +1,56 @@
+import pytest
+
+from app.garage import MemoGarageClient
+
+from ..conftest import FakeGarageClient
+
+
+class CountingGarageClient(FakeGarageClient):
+    def __init__(self):
+        self.calls = []
+
+    async def check(self, car_id: str) -> dict:
+        self.calls.append("check")
+        return await super().check(car_id)
+
+    async def get_problems(self, car_id: str) -> dict:
+        self.calls.append("get_problems")
+        return await super().get_problems(car_id)
+
+
+@pytest.mark.asyncio
+async def test_reads_are_remembered():
+    client = CountingGarageClient()
+    memo = MemoGarageClient(client)
+
+    assert await memo.check("car_1") == await memo.check("car_1")
+    assert await memo.get_problems("car_1") == await memo.get_problems("car_1")
+
+    assert client.calls == ["check", "get_problems"]
+    assert memo.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_mutation_remembers_returned_problems():
+    client = CountingGarageClient()
+    memo = MemoGarageClient(client)
+
+    assert await memo.get_problems("car_4") == {"car_4": []}
+    await memo.add_problem("car_4", "flat tire")
+    assert await memo.get_problems("car_4") == {"car_4": ["flat tire"]}
+    await memo.fix_problems("car_4")
+    assert await memo.get_problems("car_4") == {"car_4": []}
+
+    assert client.calls == ["get_problems"]
+
+
+@pytest.mark.asyncio
+async def test_failed_read_is_not_remembered():
+    client = CountingGarageClient()
+    memo = MemoGarageClient(client)
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            await memo.get_problems("missing_car")
+
+    assert client.calls == ["get_problems", "get_problems"]
@@ -0,0 +1,27 @@
+import pytest
+
+from app import metrics
+from app.garage import GarageClientNotFoundError, InstrumentedGarageClient
+
+from ..conftest import FakeGarageClient
+
+
+@pytest.mark.asyncio
+async def test_garage_calls_are_timed_and_errors_counted():
+    client = InstrumentedGarageClient(FakeGarageClient())
+    calls = metrics.GARAGE_CALL_SECONDS.count(operation="check")
+    errors = metrics.GARAGE_CALL_ERRORS.value(
+        operation="check", error="GarageClientNotFoundError"
+    )
+
+    await client.check("car_1")
+    with pytest.raises(GarageClientNotFoundError):
+        await client.check("missing_car")
+
+    assert metrics.GARAGE_CALL_SECONDS.count(operation="check") == calls + 2
+    assert (
+        metrics.GARAGE_CALL_ERRORS.value(
+            operation="check", error="GarageClientNotFoundError"
+        )
+        == errors + 1
+    )
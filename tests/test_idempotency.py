@@ -0,0 +1,127 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.idempotency import IdempotencyKeyReusedError, IdempotencyKeys
+from app.retention import Retention
+
+
+async def _enqueue(
+    idempotency_keys: IdempotencyKeys,
+    session: AsyncSession,
+    key: str = "key-1",
+    car_id: str = "car_1",
+) -> models.Task:
+    return await idempotency_keys.enqueue_task(
+        key, f"check {repr(car_id)}", car_id, "check", {"car_id": car_id}, session
+    )
+
+
+async def _count(model, session: AsyncSession) -> int:
+    return await session.scalar(select(func.count(model.id)))
+
+
+@pytest.mark.asyncio
+async def test_duplicate_key_returns_original_task(async_session: AsyncSession):
+    idempotency_keys = IdempotencyKeys()
+
+    first = await _enqueue(idempotency_keys, async_session)
+    second = await _enqueue(idempotency_keys, async_session)
+
+    assert second.id == first.id
+    assert await _count(models.Task, async_session) == 1
+    assert await _count(models.Job, async_session) == 1
+    assert idempotency_keys.stats.misses == 1
+    assert idempotency_keys.stats.hits == 1
+    assert idempotency_keys.stats.replays == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_key_is_found_without_cache(async_session: AsyncSession):
+    first = await _enqueue(IdempotencyKeys(), async_session)
+
+    # Another process, or an entry evicted from the LRU.
+    idempotency_keys = IdempotencyKeys(cache_size=0)
+    second = await _enqueue(idempotency_keys, async_session)
+
+    assert second.id == first.id
+    assert await _count(models.Task, async_session) == 1
+    assert idempotency_keys.stats.replays == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_another_request(async_session: AsyncSession):
+    idempotency_keys = IdempotencyKeys()
+    await _enqueue(idempotency_keys, async_session)
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        await _enqueue(idempotency_keys, async_session, car_id="car_2")
+    assert await _count(models.Task, async_session) == 1
+    assert idempotency_keys.stats.conflicts == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_key_schedules_new_task(async_session: AsyncSession):
+    idempotency_keys = IdempotencyKeys(window=60)
+    first_id = (await _enqueue(idempotency_keys, async_session)).id
+    await async_session.execute(
+        update(models.IdempotencyKey).values(
+            created_at=datetime.now(UTC).replace(tzinfo=None) - timedelta(minutes=2)
+        )
+    )
+    await async_session.commit()
+
+    second = await _enqueue(IdempotencyKeys(window=60), async_session)
+
+    assert second.id != first_id
+    assert await _count(models.IdempotencyKey, async_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_without_task_schedules_new_task(async_session: AsyncSession):
+    first_id = (await _enqueue(IdempotencyKeys(), async_session)).id
+    await async_session.execute(
+        delete(models.Job).where(models.Job.task_id == first_id)
+    )
+    await async_session.execute(delete(models.Task).where(models.Task.id == first_id))
+    await async_session.commit()
+
+    second = await _enqueue(IdempotencyKeys(), async_session)
+
+    assert await _count(models.Task, async_session) == 1
+    assert await _count(models.Job, async_session) == 1
+    key = await async_session.scalar(select(models.IdempotencyKey))
+    assert key.task_id == second.id
+
+
+@pytest.mark.asyncio
+async def test_retention_deletes_expired_keys(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    tmp_path,
+):
+    idempotency_keys = IdempotencyKeys()
+    await _enqueue(idempotency_keys, async_session, key="old")
+    await _enqueue(idempotency_keys, async_session, key="new", car_id="car_2")
+    await async_session.execute(
+        update(models.IdempotencyKey)
+        .where(models.IdempotencyKey.key == "old")
+        .values(created_at=datetime.now(UTC).replace(tzinfo=None) - timedelta(days=2))
+    )
+    await async_session.commit()
+
+    retention = Retention(
+        session_maker,
+        max_age_days=None,
+        max_tasks=None,
+        archive_dir=tmp_path,
+        idempotency_window=24 * 60 * 60,
+    )
+    result = await retention.run_once()
+
+    assert result.idempotency_keys == 1
+    keys = await async_session.scalars(select(models.IdempotencyKey.key))
+    assert keys.all() == ["new"]
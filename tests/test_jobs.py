@@ -0,0 +1,235 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models, schemas
+from app.jobs import JobQueue
+from app.journal import MessageJournal
+from app.repo import (
+    claim_job,
+    create_checkpoints,
+    create_messages,
+    create_task,
+    enqueue_task,
+    read_checkpoints,
+)
+
+from .conftest import FakeGarageClient
+
+
+@pytest.mark.asyncio
+async def test_job_queue_runs_job(async_session: AsyncSession, job_queue: JobQueue):
+    payload = {"car_id": "car_1"}
+    task = await enqueue_task("check 'car_1'", "car_1", "check", payload, async_session)
+    job_queue.notify()
+    await job_queue.wait_idle()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    job = await async_session.get(models.Job, 1, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.completed
+    assert job.status == schemas.JobStatuses.done
+
+
+@pytest.mark.asyncio
+async def test_job_queue_recovers_job_of_crashed_worker(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    payload = {"car_id": "car_2"}
+    task = await enqueue_task("check 'car_2'", "car_2", "check", payload, async_session)
+    await claim_job("crashed_worker", -1, async_session)
+
+    job_queue = JobQueue(session_maker, journal, FakeGarageClient(), poll_interval=0.01)
+    await job_queue.start()
+    await job_queue.wait_idle()
+    await job_queue.stop()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    job = await async_session.get(models.Job, 1, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.completed
+    assert job.status == schemas.JobStatuses.done
+    assert job.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_job_queue_fails_task_of_unknown_action(
+    async_session: AsyncSession, job_queue: JobQueue
+):
+    task = await enqueue_task("unknown", "car_1", "unknown", {}, async_session)
+    job_queue.notify()
+    await job_queue.wait_idle()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    job = await async_session.get(models.Job, 1, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.failed
+    assert job.status == schemas.JobStatuses.failed
+    assert job.attempts == 3
+
+
+class HangingGarageClient(FakeGarageClient):
+    async def _hang(self) -> dict:
+        await asyncio.Event().wait()
+
+    async def check(self, car_id: str) -> dict:
+        return await self._hang()
+
+    async def check_many(self, car_ids: list[str]) -> dict:
+        return await self._hang()
+
+
+@pytest.mark.asyncio
+async def test_job_queue_cancels_workflow_of_lost_lease(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    job_queue = JobQueue(
+        session_maker, journal, HangingGarageClient(), lease_seconds=0.3
+    )
+    payload = {"car_id": "car_1"}
+    task = await enqueue_task("check 'car_1'", "car_1", "check", payload, async_session)
+    job = await claim_job(job_queue.worker_id, job_queue.lease_seconds, async_session)
+    await async_session.execute(
+        update(models.Job).values(locked_by="other_worker", lease_until=None)
+    )
+    await async_session.commit()
+
+    await asyncio.wait_for(job_queue._run_job(job), 2)
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    job = await async_session.get(models.Job, job.id, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.in_progress
+    assert job.status == schemas.JobStatuses.running
+    assert job.locked_by == "other_worker"
+
+
+@pytest.mark.asyncio
+async def test_job_queue_cancels_workflow_when_lease_cannot_be_renewed(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def extend_job_lease(*args):
+        raise ConnectionError("database is gone")
+
+    monkeypatch.setattr("app.repo.extend_job_lease", extend_job_lease)
+    job_queue = JobQueue(
+        session_maker, journal, HangingGarageClient(), lease_seconds=0.3
+    )
+    payload = {"car_id": "car_1"}
+    task = await enqueue_task("check 'car_1'", "car_1", "check", payload, async_session)
+    job = await claim_job(job_queue.worker_id, job_queue.lease_seconds, async_session)
+
+    await asyncio.wait_for(job_queue._run_job(job), 2)
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    job = await async_session.get(models.Job, job.id, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.in_progress
+    assert job.status == schemas.JobStatuses.running
+
+
+class RecordingGarageClient(FakeGarageClient):
+    def __init__(self):
+        self.calls = []
+
+    async def add_problem(self, car_id: str, problem: str) -> dict:
+        self.calls.append("add_problem")
+        return await super().add_problem(car_id, problem)
+
+    async def update_status(self, car_id: str) -> dict:
+        self.calls.append("update_status")
+        return await super().update_status(car_id)
+
+
+@pytest.mark.asyncio
+async def test_job_queue_resumes_interrupted_workflow_from_checkpoint(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    payload = {"car_id": "car_3", "problem": "flat tire"}
+    name = "send for repair 'car_3'"
+    task = await enqueue_task(name, "car_3", "send_for_repair", payload, async_session)
+    job = await claim_job("crashed_worker", 60, async_session)
+    job.updated_at = datetime.now(UTC).replace(tzinfo=None) - timedelta(minutes=5)
+    await async_session.commit()
+    await create_messages(
+        [
+            schemas.MessageCreate(body=f"Start {name}", task_id=task.id),
+            schemas.MessageCreate(
+                body="Ping 'car_3': Ok",
+                task_id=task.id,
+                step_name="check",
+                outcome=schemas.StepOutcomes.succeeded,
+            ),
+        ],
+        async_session,
+    )
+    await create_checkpoints(
+        [
+            schemas.CheckpointCreate(
+                task_id=task.id,
+                step_index=index,
+                step_name=step_name,
+                result=result,
+                message=message,
+            )
+            for index, step_name, result, message in [
+                (0, "check", {"car_3": True}, "Ping 'car_3': Ok"),
+                (1, "problems_before", {"car_3": []}, "Car 'car_3' problems: []"),
+                (
+                    2,
+                    "add_problem",
+                    {"car_3": ["flat tire"]},
+                    "Car 'car_3' problems after adding: ['flat tire']",
+                ),
+            ]
+        ],
+        async_session,
+    )
+    garage_client = RecordingGarageClient()
+
+    job_queue = JobQueue(session_maker, journal, garage_client, poll_interval=0.01)
+    await job_queue.resume()
+    await job_queue.start()
+    await job_queue.wait_idle()
+    await job_queue.stop()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.completed
+    assert garage_client.calls == ["update_status"]
+    bodies = [msg.body for msg in task.messages]
+    assert bodies[:5] == [
+        f"Start {name}",
+        "Ping 'car_3': Ok",
+        f"Resume {name}",
+        "Car 'car_3' problems: []",
+        "Car 'car_3' problems after adding: ['flat tire']",
+    ]
+    assert bodies[-1] == f"End {name}"
+    checkpoints = await read_checkpoints(task.id, async_session)
+    assert [checkpoint.step_name for checkpoint in checkpoints] == [
+        "check",
+        "problems_before",
+        "add_problem",
+        "problems_after",
+        "update_status",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_job_queue_fails_orphaned_task(
+    async_session: AsyncSession, job_queue: JobQueue
+):
+    task = await create_task("check 'car_1'", "car_1", async_session)
+
+    await job_queue.resume()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.failed
+    assert [msg.body for msg in task.messages] == ["Interrupted check 'car_1'"]
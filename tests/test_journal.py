@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.journal import MessageJournal
+from app.repo import create_task
+
+
+@pytest.mark.asyncio
+async def test_journal_commits_messages_in_one_batch(
+    async_session: AsyncSession, journal: MessageJournal
+):
+    task = await create_task("test task", "car_1", async_session)
+
+    acks = [journal.append(f"msg {n}", task.id) for n in range(10)]
+    await asyncio.gather(*acks)
+
+    result = await async_session.execute(
+        select(models.Message.body).order_by(models.Message.id)
+    )
+    assert result.scalars().all() == [f"msg {n}" for n in range(10)]
+    assert journal.stats.flushes == 1
+    assert journal.stats.messages == 10
+    assert journal.stats.batch_size_max == 10
+
+
+@pytest.mark.asyncio
+async def test_journal_respects_max_batch_size(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    task = await create_task("test task", "car_1", async_session)
+    journal = MessageJournal(session_maker, flush_interval=1, max_batch_size=4)
+    await journal.start()
+
+    acks = [journal.append(f"msg {n}", task.id) for n in range(10)]
+    await asyncio.gather(*acks)
+    await journal.stop()
+
+    assert journal.stats.flushes == 3
+    assert journal.stats.messages == 10
+    assert journal.stats.batch_size_max == 4
+
+
+@pytest.mark.asyncio
+async def test_journal_stop_flushes_pending_messages(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    task = await create_task("test task", "car_1", async_session)
+    journal = MessageJournal(session_maker, flush_interval=10)
+    await journal.start()
+
+    ack = journal.append("last msg", task.id)
+    await journal.stop()
+
+    assert ack.done()
+    assert journal.stats.messages == 1
+
+
+@pytest.mark.asyncio
+async def test_journal_failed_flush_fails_acks(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def create_messages(*args):
+        raise ConnectionError("database is gone")
+
+    monkeypatch.setattr("app.repo.create_messages", create_messages)
+    task = await create_task("test task", "car_1", async_session)
+    journal = MessageJournal(session_maker, flush_interval=0.01)
+    await journal.start()
+
+    awaited = journal.append("awaited msg", task.id)
+    not_awaited = journal.append("fire and forget msg", task.id)
+    with pytest.raises(ConnectionError):
+        await awaited
+    await journal.stop()
+
+    assert journal.stats.errors == 1
+    # Nobody awaits it, so asyncio must not log its exception as unretrieved.
+    assert not not_awaited._log_traceback
+    assert isinstance(not_awaited.exception(), ConnectionError)
+
+
+@pytest.mark.asyncio
+async def test_read_journal_stats(async_client: AsyncClient):
+    response = await async_client.get("/messages/journal")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["flushes"] == 0
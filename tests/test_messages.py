@@ -35,3 +35,91 @@ async def test_read_messages(async_client: AsyncClient, async_session: AsyncSess
     assert msg_data_2["task_id"] == 1
     assert "created_at" in msg_data_2
     assert isinstance(msg_data_2["created_at"], str)
+
+
+@pytest.mark.asyncio
+async def test_read_messages_with_cursor(
+    async_client: AsyncClient, async_session: AsyncSession
+):
+    for n in range(1, 4):
+        async_session.add(models.Message(body=f"test msg {n}", task_id=1))
+    await async_session.commit()
+
+    response = await async_client.get("/messages?limit=2")
+    data = response.json()
+    assert [msg["id"] for msg in data["messages"]] == [3, 2]
+
+    response = await async_client.get(f"/messages?limit=2&cursor={data['next_cursor']}")
+    data = response.json()
+    assert [msg["id"] for msg in data["messages"]] == [1]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_read_step_latencies(
+    async_client: AsyncClient, async_session: AsyncSession
+):
+    messages = [
+        models.Message(
+            body=f"check {duration}",
+            task_id=1,
+            step_name="check",
+            duration_ms=duration,
+            attempt=1,
+            outcome=(
+                schemas.StepOutcomes.failed
+                if duration > 98
+                else schemas.StepOutcomes.succeeded
+            ),
+        )
+        for duration in range(100, 0, -1)
+    ]
+    messages.append(
+        models.Message(
+            body="retry",
+            task_id=1,
+            step_name="check",
+            duration_ms=5000,
+            attempt=1,
+            outcome=schemas.StepOutcomes.retried,
+        )
+    )
+    messages.append(
+        models.Message(
+            body="update",
+            task_id=1,
+            step_name="update_status",
+            duration_ms=7,
+            attempt=1,
+            outcome=schemas.StepOutcomes.succeeded,
+        )
+    )
+    messages.append(models.Message(body="Start", task_id=1))
+    async_session.add_all(messages)
+    await async_session.commit()
+
+    response = await async_client.get("/messages/steps")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["steps"] == [
+        {
+            "step_name": "check",
+            "count": 100,
+            "failed": 2,
+            "mean_ms": 50.5,
+            "p50_ms": 50,
+            "p95_ms": 95,
+            "p99_ms": 99,
+            "max_ms": 100,
+        },
+        {
+            "step_name": "update_status",
+            "count": 1,
+            "failed": 0,
+            "mean_ms": 7,
+            "p50_ms": 7,
+            "p95_ms": 7,
+            "p99_ms": 7,
+            "max_ms": 7,
+        },
+    ]
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app import metrics
+from app.jobs import JobQueue
+
+
+def test_registry_renders_text_format():
+    registry = metrics.MetricsRegistry()
+    requests = registry.counter("requests", "Handled requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.")
+    in_flight = registry.gauge("in_flight", "Running now.")
+
+    requests.inc(route="/tasks")
+    requests.inc(2, route="/tasks")
+    latency.observe(0.02)
+    latency.observe(7)
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+    assert "# TYPE requests counter" in text
+    assert 'requests_total{route="/tasks"} 3' in text
+    assert 'latency_seconds_bucket{le="0.01"} 0' in text
+    assert 'latency_seconds_bucket{le="0.025"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_sum 7.02" in text
+    assert "latency_seconds_count 2" in text
+    assert "in_flight 1" in text
+
+
+def test_metric_rejects_unknown_labels():
+    counter = metrics.Counter("errors", "Errors.", ("operation",))
+
+    with pytest.raises(ValueError):
+        counter.inc(route="/tasks")
+
+
+@pytest.mark.asyncio
+async def test_read_metrics(async_client: AsyncClient, job_queue: JobQueue):
+    workflows = metrics.WORKFLOW_SECONDS.count(workflow="check", outcome="completed")
+    steps = metrics.STEP_SECONDS.count(step="check", outcome="succeeded")
+    requests = metrics.HTTP_REQUEST_SECONDS.count(
+        method="GET", route="/tasks/{task_id}", status="404"
+    )
+
+    await async_client.post("/cars/car_1/actions/check")
+    await job_queue.wait_idle()
+    await async_client.get("/tasks/1000")
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert "# TYPE db_commit_duration_seconds histogram" in response.text
+    assert "workflows_in_flight 0" in response.text
+    assert (
+        metrics.WORKFLOW_SECONDS.count(workflow="check", outcome="completed")
+        == workflows + 1
+    )
+    assert metrics.STEP_SECONDS.count(step="check", outcome="succeeded") == steps + 1
+    assert (
+        metrics.HTTP_REQUEST_SECONDS.count(
+            method="GET", route="/tasks/{task_id}", status="404"
+        )
+        == requests + 1
+    )
@@ -0,0 +1,115 @@
+import asyncio
+import pstats
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+
+from app.main import debug_router
+from app.profiling import PROFILER, Profiler, ProfilingMiddleware
+
+
+async def busy():
+    await asyncio.sleep(0)
+    return sum(range(1000))
+
+
+@pytest.mark.asyncio
+async def test_disabled_profiler_captures_nothing():
+    profiler = Profiler(enabled=False, threshold=0)
+
+    async with profiler.profile("request", "GET /tasks"):
+        await busy()
+
+    assert len(profiler.profiles) == 0
+
+
+@pytest.mark.asyncio
+async def test_profiles_below_threshold_are_dropped():
+    profiler = Profiler(enabled=True, threshold=60)
+
+    async with profiler.profile("request", "GET /tasks"):
+        await busy()
+
+    assert len(profiler.profiles) == 0
+
+
+@pytest.mark.asyncio
+async def test_last_profiles_are_kept(tmp_path):
+    profiler = Profiler(enabled=True, threshold=0, buffer_size=2)
+
+    for number in range(3):
+        async with profiler.profile("workflow", f"workflow {number}"):
+            await busy()
+
+    assert [profile.name for profile in profiler.profiles] == [
+        "workflow 1",
+        "workflow 2",
+    ]
+    profile = profiler.get(3)
+    assert "busy" in profile.text()
+    path = tmp_path / "profile.prof"
+    path.write_bytes(profile.dump())
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+@pytest.mark.asyncio
+async def test_overlapping_profiles_are_skipped():
+    profiler = Profiler(enabled=True, threshold=0)
+
+    async def profiled(name: str):
+        async with profiler.profile("workflow", name):
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(profiled("first"), profiled("second"))
+
+    assert len(profiler.profiles) == 1
+    assert profiler.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_profile_header_is_ignored_by_default(async_client: AsyncClient):
+    profiles = len(PROFILER.profiles)
+
+    response = await async_client.get("/tasks", headers={"X-Profile": "0"})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(PROFILER.profiles) == profiles
+
+    response = await async_client.get("/debug/profiles")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_profile_request_with_header():
+    debug_app = FastAPI()
+    debug_app.add_middleware(ProfilingMiddleware, header_enabled=True)
+    debug_app.include_router(debug_router)
+
+    @debug_app.get("/busy")
+    async def read_busy() -> int:
+        return await busy()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=debug_app), base_url="http://test"
+    ) as async_client:
+        response = await async_client.get("/busy", headers={"X-Profile": "0"})
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await async_client.get("/debug/profiles")
+        assert response.status_code == status.HTTP_200_OK
+        profile = response.json()["profiles"][-1]
+        assert profile["kind"] == "request"
+        assert profile["name"] == "GET /busy"
+
+        response = await async_client.get(f"/debug/profiles/{profile['id']}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/octet-stream"
+
+        response = await async_client.get(
+            f"/debug/profiles/{profile['id']}", params={"format": "text"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "function calls" in response.text
+
+        response = await async_client.get("/debug/profiles/0")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
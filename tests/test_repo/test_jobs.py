@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.repo import (
+    claim_job,
+    count_pending_jobs,
+    count_pending_jobs_by_car,
+    enqueue_task,
+    finish_job,
+)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_task(async_session: AsyncSession):
+    payload = {"car_id": "car_1"}
+    task = await enqueue_task("test task", "car_1", "check", payload, async_session)
+    assert isinstance(task, models.Task)
+    assert task.status == schemas.TaskStatuses.in_progress
+
+    job = await async_session.get(models.Job, 1)
+    assert job.task_id == task.id
+    assert job.action == "check"
+    assert job.payload == payload
+    assert job.status == schemas.JobStatuses.queued
+    assert job.attempts == 0
+    assert await count_pending_jobs(async_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_job(async_session: AsyncSession):
+    await enqueue_task("test task", "car_1", "check", {}, async_session)
+
+    job = await claim_job("worker_1", 60, async_session)
+    assert job.status == schemas.JobStatuses.running
+    assert job.locked_by == "worker_1"
+    assert job.attempts == 1
+    assert await claim_job("worker_2", 60, async_session) is None
+
+    await finish_job(job.id, schemas.JobStatuses.done, async_session)
+    assert await count_pending_jobs(async_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_claim_job_with_expired_lease(async_session: AsyncSession):
+    await enqueue_task("test task", "car_1", "check", {}, async_session)
+
+    await claim_job("worker_1", -1, async_session)
+    job = await claim_job("worker_2", 60, async_session)
+    assert job.locked_by == "worker_2"
+    assert job.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_claim_job_serializes_jobs_of_one_car(async_session: AsyncSession):
+    await enqueue_task("first car_1 task", "car_1", "check", {}, async_session)
+    await enqueue_task("second car_1 task", "car_1", "check", {}, async_session)
+    await enqueue_task("car_2 task", "car_2", "check", {}, async_session)
+    assert await count_pending_jobs_by_car(async_session) == {
+        "car_1": {"queued": 2, "running": 0},
+        "car_2": {"queued": 1, "running": 0},
+    }
+
+    first_job = await claim_job("worker_1", 60, async_session)
+    other_car_job = await claim_job("worker_2", 60, async_session)
+    assert (first_job.id, other_car_job.id) == (1, 3)
+    assert await claim_job("worker_3", 60, async_session) is None
+    assert await count_pending_jobs_by_car(async_session) == {
+        "car_1": {"queued": 1, "running": 1},
+        "car_2": {"queued": 0, "running": 1},
+    }
+
+    await finish_job(first_job.id, schemas.JobStatuses.done, async_session)
+    second_job = await claim_job("worker_3", 60, async_session)
+    assert second_job.id == 2
@@ -13,7 +13,14 @@ def test_message_schema():
     assert isinstance(message, schemas.MessageCreate)
     assert hasattr(message, "body")
     assert hasattr(message, "task_id")
-    assert message.model_dump() == {"body": "test message", "task_id": 1}
+    assert message.model_dump() == {
+        "body": "test message",
+        "task_id": 1,
+        "step_name": None,
+        "duration_ms": None,
+        "attempt": None,
+        "outcome": None,
+    }
 
 
 def test_create_message_model_invalid_task_id():
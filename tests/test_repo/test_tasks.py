@@ -68,3 +68,6 @@ async def test_read_tasks(async_session: AsyncSession):
     tasks = await repo.read_tasks(async_session, 1, 1)
     assert len(tasks) == 1
     assert task_1 == tasks[0]
+
+    tasks = await repo.read_tasks(async_session, before_id=task_2.id)
+    assert tasks == [task_1]
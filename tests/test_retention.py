@@ -0,0 +1,122 @@
+import asyncio
+import gzip
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import db, models, schemas
+from app.repo import create_message, create_task, update_task
+from app.retention import Retention, RetentionResult, enable_incremental_vacuum
+
+
+async def _finished_task(
+    name: str, status: str, async_session: AsyncSession
+) -> models.Task:
+    task = await create_task(name, "car_1", async_session)
+    await create_message(f"Start {name}", task.id, async_session)
+    return await update_task(task.id, {"status": status}, async_session)
+
+
+def _read_archive(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+@pytest.mark.asyncio
+async def test_retention_keeps_row_budget(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    tmp_path,
+):
+    await _finished_task("first", schemas.TaskStatuses.completed, async_session)
+    await _finished_task("second", schemas.TaskStatuses.failed, async_session)
+    await create_task("running", "car_1", async_session)
+    await _finished_task("third", schemas.TaskStatuses.completed, async_session)
+    retention = Retention(
+        session_maker,
+        max_age_days=None,
+        max_tasks=1,
+        batch_size=1,
+        archive_dir=tmp_path,
+    )
+
+    result = await retention.run_once()
+
+    assert (result.tasks, result.messages, result.jobs) == (2, 2, 0)
+    archived = _read_archive(result.archive)
+    assert [task["name"] for task in archived] == ["first", "second"]
+    assert archived[0]["messages"][0]["body"] == "Start first"
+    names = await async_session.scalars(
+        select(models.Task.name).order_by(models.Task.id)
+    )
+    assert names.all() == ["running", "third"]
+
+
+@pytest.mark.asyncio
+async def test_retention_deletes_by_age(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    tmp_path,
+):
+    old = await _finished_task("old", schemas.TaskStatuses.completed, async_session)
+    old.updated_at = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=2)
+    await async_session.commit()
+    await _finished_task("new", schemas.TaskStatuses.completed, async_session)
+    retention = Retention(
+        session_maker, max_age_days=1, max_tasks=None, archive_dir=tmp_path
+    )
+
+    result = await retention.run_once()
+
+    assert result.tasks == 1
+    assert [task["name"] for task in _read_archive(result.archive)] == ["old"]
+    assert await retention.run_once() == RetentionResult()
+
+
+@pytest.mark.asyncio
+async def test_retention_runs_incremental_vacuum(tmp_path):
+    engine = db.create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    try:
+        await enable_incremental_vacuum(engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+        session_maker = db.create_session_maker(engine)
+        async with session_maker() as session:
+            for number in range(20):
+                task = await create_task(f"task {number}", "car_1", session)
+                await create_message("x" * 4000, task.id, session)
+                await update_task(task.id, {"status": "completed"}, session)
+        retention = Retention(
+            session_maker, max_age_days=None, max_tasks=0, archive_dir=tmp_path
+        )
+
+        result = await retention.run_once()
+
+        assert result.tasks == 20
+        assert result.vacuumed_pages > 0
+        async with engine.connect() as conn:
+            assert await conn.scalar(text("PRAGMA auto_vacuum")) == 2
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_scheduled_retention_waits_one_interval(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    tmp_path,
+):
+    await _finished_task("old task", schemas.TaskStatuses.completed, async_session)
+    retention = Retention(
+        session_maker, max_age_days=None, max_tasks=0, archive_dir=tmp_path, interval=60
+    )
+
+    await retention.start()
+    await asyncio.sleep(0.05)
+    await retention.stop()
+
+    assert retention.last_result is None
+    assert len((await async_session.scalars(select(models.Task))).all()) == 1
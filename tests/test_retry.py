@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import schemas
+from app.actions._garage import ActionsGarageError, _check
+from app.actions._retry import RetryPolicy
+from app.actions._runner import Step, Workflow, _run_steps
+from app.garage import GarageClientError
+from app.journal import MessageJournal
+from app.repo import create_task
+
+from .conftest import FakeGarageClient
+
+
+class FlakyGarageClient(FakeGarageClient):
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def check(self, car_id: str) -> dict:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise GarageClientError("garage is down")
+        return await super().check(car_id)
+
+
+def test_retry_delay_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=3)
+    assert 0 <= policy.delay(1) <= 1
+    assert all(0 <= policy.delay(10) <= 3 for _ in range(100))
+
+
+@pytest.mark.asyncio
+async def test_retry_until_success():
+    garage_client = FlakyGarageClient(failures=2)
+    attempts = []
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+
+    result, msg = await policy.call(
+        _check,
+        "car_1",
+        garage_client,
+        on_retry=lambda attempt, err, delay: attempts.append(attempt),
+    )
+
+    assert result == {"car_1": True}
+    assert attempts == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_retry_gives_up_after_max_attempts():
+    garage_client = FlakyGarageClient(failures=5)
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+
+    with pytest.raises(ActionsGarageError):
+        await policy.call(_check, "car_1", garage_client)
+    assert garage_client.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_skips_not_found_errors():
+    garage_client = FakeGarageClient()
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+
+    with pytest.raises(ActionsGarageError):
+        await policy.call(_check, "invalid_car", garage_client)
+
+
+@pytest.mark.asyncio
+async def test_run_steps_logs_every_retry(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    task = await create_task("test task", "car_1", async_session)
+    workflow = Workflow(
+        steps=(
+            Step(
+                "check",
+                _check,
+                args=("car_id", "garage_client"),
+                retry=RetryPolicy(max_attempts=3, base_delay=0),
+            ),
+        )
+    )
+    context = {"car_id": "car_1", "garage_client": FlakyGarageClient(failures=1)}
+
+    task = await _run_steps(
+        "test task", workflow, context, task.id, session_maker, journal
+    )
+
+    assert task.status == schemas.TaskStatuses.completed
+    assert [msg.body for msg in task.messages] == [
+        "Start test task",
+        "Error while trying to check car 'car_1'! "
+        "Attempt 1 of 3 failed, retrying in 0.00s",
+        "Ping 'car_1': Ok",
+        "End test task",
+    ]
+    assert [(msg.step_name, msg.attempt, msg.outcome) for msg in task.messages] == [
+        (None, None, None),
+        ("check", 1, schemas.StepOutcomes.retried),
+        ("check", 2, schemas.StepOutcomes.succeeded),
+        (None, None, None),
+    ]
+    assert all(msg.duration_ms >= 0 for msg in task.messages[1:3])
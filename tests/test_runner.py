@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import schemas
+from app.actions._cars import SEND_FOR_REPAIR, SEND_TO_PARKING
+from app.actions._garage import ActionsGarageError
+from app.actions._runner import Step, Workflow, _run_steps
+from app.journal import MessageJournal
+from app.repo import create_checkpoints, create_task, read_checkpoints
+
+
+@pytest.mark.asyncio
+async def test_run_steps_releases_connection_between_writes(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    task = await create_task("test task", "car_1", async_session)
+    await async_session.close()
+    pool = session_maker.kw["bind"].pool
+    checked_out = []
+
+    async def step():
+        checked_out.append(pool.checkedout())
+        return {}, "step done"
+
+    workflow = Workflow(steps=(Step("first", step), Step("second", step)))
+    task = await _run_steps("test task", workflow, {}, task.id, session_maker, journal)
+
+    assert checked_out == [0, 0]
+    assert task.status == schemas.TaskStatuses.completed
+    assert [msg.body for msg in task.messages] == [
+        "Start test task",
+        "step done",
+        "step done",
+        "End test task",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_steps_overlaps_independent_steps(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    task = await create_task("test task", "car_1", async_session)
+    both_started = asyncio.Barrier(2)
+
+    async def independent(value: int):
+        await asyncio.wait_for(both_started.wait(), 1)
+        return value, f"got {value}"
+
+    async def dependent(first: int, second: int):
+        return first + second, f"sum {first + second}"
+
+    workflow = Workflow(
+        steps=(
+            Step("first", independent, args=("first_value",)),
+            Step("second", independent, args=("second_value",)),
+            Step("sum", dependent, args=("first", "second"), after=("first", "second")),
+        )
+    )
+    context = {"first_value": 1, "second_value": 2}
+    task = await _run_steps(
+        "test task", workflow, context, task.id, session_maker, journal
+    )
+
+    assert task.status == schemas.TaskStatuses.completed
+    assert [msg.body for msg in task.messages] == [
+        "Start test task",
+        "got 1",
+        "got 2",
+        "sum 3",
+        "End test task",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_steps_reports_first_failure_in_declared_order(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    task = await create_task("test task", "car_1", async_session)
+
+    async def slow_failure():
+        await asyncio.sleep(0.01)
+        raise ActionsGarageError("first failed")
+
+    async def fast_failure():
+        raise ActionsGarageError("second failed")
+
+    async def never_called():
+        raise AssertionError
+
+    workflow = Workflow(
+        steps=(
+            Step("first", slow_failure),
+            Step("second", fast_failure),
+            Step("third", never_called, after=("first",)),
+        )
+    )
+    task = await _run_steps("test task", workflow, {}, task.id, session_maker, journal)
+
+    assert task.status == schemas.TaskStatuses.failed
+    assert [msg.body for msg in task.messages] == [
+        "Start test task",
+        "first failed",
+        "End test task",
+    ]
+    checkpoints = await read_checkpoints(task.id, async_session)
+    assert [
+        (checkpoint.step_name, checkpoint.outcome, checkpoint.message)
+        for checkpoint in checkpoints
+    ] == [
+        ("first", schemas.StepOutcomes.failed, "first failed"),
+        ("second", schemas.StepOutcomes.failed, "second failed"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_steps_resumes_failed_run_as_failed(
+    async_session: AsyncSession,
+    session_maker: async_sessionmaker[AsyncSession],
+    journal: MessageJournal,
+):
+    task = await create_task("test task", "car_1", async_session)
+    await create_checkpoints(
+        [
+            schemas.CheckpointCreate(
+                task_id=task.id,
+                step_index=0,
+                step_name="first",
+                result=1,
+                message="got 1",
+            ),
+            schemas.CheckpointCreate(
+                task_id=task.id,
+                step_index=1,
+                step_name="second",
+                result=None,
+                message="second failed",
+                outcome=schemas.StepOutcomes.failed,
+            ),
+        ],
+        async_session,
+    )
+
+    async def never_called():
+        raise AssertionError
+
+    workflow = Workflow(
+        steps=(
+            Step("first", never_called),
+            Step("second", never_called),
+            Step("third", never_called),
+        )
+    )
+    task = await _run_steps("test task", workflow, {}, task.id, session_maker, journal)
+
+    assert task.status == schemas.TaskStatuses.failed
+    assert [msg.body for msg in task.messages] == [
+        "Resume test task",
+        "got 1",
+        "second failed",
+        "End test task",
+    ]
+
+
+def test_workflow_rejects_unknown_dependency():
+    async def step():
+        return {}, ""
+
+    with pytest.raises(ValueError):
+        Workflow(steps=(Step("first", step, after=("second",)), Step("second", step)))
+
+
+@pytest.mark.parametrize("workflow", [SEND_FOR_REPAIR, SEND_TO_PARKING])
+def test_status_update_is_not_overlapped_by_reads(workflow: Workflow):
+    # A failed read cancels the steps still running, a mutation must not be
+    # one of them.
+    steps = {step.name: step for step in workflow.steps}
+    assert steps["update_status"].after == ("problems_after",)
@@ -53,3 +53,57 @@ async def test_read_task_by_invalid_id(async_client: AsyncClient):
     response = await async_client.get("/tasks/1")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json() == {"detail": "Task with id=1 not found"}
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_with_cursor(
+    async_client: AsyncClient, async_session: AsyncSession
+):
+    for n in range(1, 4):
+        async_session.add(
+            models.Task(name=f"test task {n}", car_id="car_1", status="in progress")
+        )
+    await async_session.commit()
+
+    response = await async_client.get("/tasks?limit=2")
+    data = response.json()
+    assert [task["id"] for task in data["tasks"]] == [3, 2]
+    assert data["next_cursor"] is not None
+
+    response = await async_client.get(f"/tasks?limit=2&cursor={data['next_cursor']}")
+    data = response.json()
+    assert [task["id"] for task in data["tasks"]] == [1]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_with_invalid_cursor(async_client: AsyncClient):
+    response = await async_client.get("/tasks?cursor=invalid")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor 'invalid'"}
+
+
+@pytest.mark.asyncio
+async def test_read_tasks_summary(
+    async_client: AsyncClient, async_session: AsyncSession
+):
+    task_1 = models.Task(name="test task 1", car_id="car_1", status="completed")
+    task_2 = models.Task(name="test task 2", car_id="car_2", status="in progress")
+    async_session.add_all([task_1, task_2])
+    await async_session.commit()
+    async_session.add_all(
+        [
+            models.Message(body="msg 1", task_id=task_1.id),
+            models.Message(body="msg 2", task_id=task_1.id),
+        ]
+    )
+    await async_session.commit()
+
+    response = await async_client.get("/tasks?view=summary")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [
+        (task["id"], task["message_count"], task["last_message"])
+        for task in data["tasks"]
+    ] == [(2, 0, None), (1, 2, "msg 2")]
+    assert "messages" not in data["tasks"][0]
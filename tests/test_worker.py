@@ -0,0 +1,99 @@
+import asyncio
+import signal
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import helpers, models, schemas, settings
+from app.garage import BatchingGarageClient
+from app.repo import claim_job, enqueue_task
+from app.worker import Worker, _stop_on_signals
+
+from .conftest import FakeGarageClient
+
+
+@pytest.mark.asyncio
+async def test_workers_share_jobs(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    for n in range(6):
+        car_id = f"car_{n % 3 + 1}"
+        await enqueue_task(
+            f"check {repr(car_id)}", car_id, "check", {"car_id": car_id}, async_session
+        )
+    workers = [
+        Worker(
+            session_maker,
+            BatchingGarageClient(FakeGarageClient()),
+            concurrency=2,
+            poll_interval=0.01,
+        )
+        for _ in range(2)
+    ]
+    for worker in workers:
+        await worker.start()
+    await workers[0].job_queue.wait_idle()
+    await asyncio.gather(*(worker.stop() for worker in workers))
+
+    tasks = (await async_session.scalars(select(models.Task))).all()
+    jobs = (await async_session.scalars(select(models.Job))).all()
+    assert {task.status for task in tasks} == {schemas.TaskStatuses.completed}
+    assert {job.status for job in jobs} == {schemas.JobStatuses.done}
+    assert {job.attempts for job in jobs} == {1}
+
+
+@pytest.mark.asyncio
+async def test_worker_picks_up_job_of_crashed_worker(
+    async_session: AsyncSession, session_maker: async_sessionmaker[AsyncSession]
+):
+    task = await enqueue_task(
+        "check 'car_1'", "car_1", "check", {"car_id": "car_1"}, async_session
+    )
+    await claim_job("crashed_worker", -1, async_session)
+
+    worker = Worker(session_maker, FakeGarageClient(), poll_interval=0.01)
+    await worker.start()
+    await worker.job_queue.wait_idle()
+    await worker.stop()
+
+    task = await async_session.get(models.Task, task.id, populate_existing=True)
+    assert task.status == schemas.TaskStatuses.completed
+
+
+@pytest.mark.asyncio
+async def test_api_without_job_workers(
+    monkeypatch: pytest.MonkeyPatch,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    monkeypatch.setattr(settings, "JOB_RUN_IN_API", False)
+    app = FastAPI()
+    app.state.session_maker = session_maker
+    helpers.init_garage_state(app, FakeGarageClient())
+
+    await helpers.start_job_queue(app)
+    workers = app.state.job_queue._workers
+    await helpers.stop_job_queue(app)
+
+    assert workers == []
+
+
+@pytest.mark.asyncio
+async def test_stop_signals_without_loop_signal_handlers(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def add_signal_handler(*args):
+        raise NotImplementedError
+
+    handlers = {}
+    loop = asyncio.get_running_loop()
+    monkeypatch.setattr(loop, "add_signal_handler", add_signal_handler)
+    monkeypatch.setattr(signal, "signal", handlers.__setitem__)
+    stopped = asyncio.Event()
+
+    _stop_on_signals(stopped)
+    handlers[signal.SIGTERM](signal.SIGTERM, None)
+    await asyncio.wait_for(stopped.wait(), 1)
+
+    assert set(handlers) == {signal.SIGINT, signal.SIGTERM}